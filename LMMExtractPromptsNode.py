@@ -4,79 +4,300 @@
 import os
 import json
 import re
-from typing import Tuple, List, Dict, Any
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Dict, Any, Optional
 from PIL import Image
 
+try:
+    from .png_chunks import read_png_text_chunks
+except ImportError:
+    # loaded outside the package (benchmarks/)
+    from png_chunks import read_png_text_chunks
+
 # ----- helpers -----
 
+DEFAULT_WORKERS = 8
+MAX_WORKERS = 64
+METADATA_KEYS = ('parameters', 'prompt', 'workflow')
+EXTRACT_CACHE_SIZE = 4096
+# embedded workflows larger than this are parsed with _prune_workflow_object
+STREAMING_PARSE_THRESHOLD = 1024 * 1024
+
 LORA_TAG_RE = re.compile(r'\s*<lora:[^>]+>')
+LORA_FIND_RE = re.compile(r'<lora:([^>]+)>')
+SETTING_RE = re.compile(r'\s*(\w[\w \-/]+):\s*("(?:\\.|[^\\"])+"|[^,]*)(?:,|$)')
+
+NEGATIVE_MARKER = 'Negative prompt:'
+STEPS_MARKER = 'Steps:'
 
 def strip_lora_tags(text: str) -> str:
     if not isinstance(text, str):
         return ""
+    if '<lora:' not in text:
+        return text.strip()
     return LORA_TAG_RE.sub('', text).strip()
 
-def extract_lora_and_steps(parameters: str) -> str:
+def _find_settings_tail(text: str) -> int:
+    # first "Steps:" followed by whitespace, like the A1111 settings line
+    i = text.find(STEPS_MARKER)
+    while i >= 0:
+        j = i + len(STEPS_MARKER)
+        if j < len(text) and text[j].isspace():
+            return i
+        i = text.find(STEPS_MARKER, i + 1)
+    return -1
+
+def _parse_settings(line: str) -> Dict[str, str]:
+    settings: Dict[str, str] = {}
+    for key, value in SETTING_RE.findall(line):
+        value = value.strip()
+        if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+            try:
+                value = json.loads(value)
+            except Exception:
+                value = value[1:-1]
+        settings[key.strip()] = value
+    return settings
+
+def parse_a1111_parameters(parameters: str, with_settings: bool = True) -> Dict[str, Any]:
+    """Split an A1111 ``parameters`` string into its parts in one pass over the markers.
+
+    Returns a dict with ``positive`` / ``negative`` (LoRA tags removed), ``lora_tags``
+    (raw ``<lora:...>`` tags), ``loras`` (``{"name", "weight"}`` dicts), ``settings``
+    (key/value pairs of the ``Steps:`` line, skipped when ``with_settings`` is False)
+    and ``settings_raw`` (everything from ``Steps:`` on).
+    """
+    record: Dict[str, Any] = {"positive": "", "negative": "", "lora_tags": [], "loras": [], "settings": {}, "settings_raw": ""}
     if not isinstance(parameters, str):
-        return ""
-    loras = " ".join(re.findall(r'<lora:[^>]+>', parameters))
-    m = re.search(r'(Steps:\s.*)', parameters, re.DOTALL)
-    tail = m.group(1).strip() if m else ""
+        return record
+
+    neg_i = parameters.find(NEGATIVE_MARKER)
+    if neg_i >= 0:
+        positive = parameters[:neg_i]
+        neg_start = neg_i + len(NEGATIVE_MARKER)
+        steps_i = parameters.find(STEPS_MARKER, neg_start)
+        negative = parameters[neg_start:steps_i] if steps_i >= 0 else parameters[neg_start:]
+    else:
+        steps_i = parameters.find(STEPS_MARKER)
+        positive = parameters[:steps_i] if steps_i >= 0 else parameters
+        negative = ""
+    record["positive"] = strip_lora_tags(positive.strip())
+    record["negative"] = strip_lora_tags(negative.strip())
+
+    for m in LORA_FIND_RE.finditer(parameters) if '<lora:' in parameters else ():
+        record["lora_tags"].append(m.group(0))
+        name, _, rest = m.group(1).partition(':')
+        record["loras"].append({"name": name, "weight": rest.split(':')[0] if rest else "1"})
+
+    tail_i = _find_settings_tail(parameters)
+    if tail_i >= 0:
+        tail = parameters[tail_i:].strip()
+        record["settings_raw"] = tail
+        if with_settings:
+            record["settings"] = _parse_settings(tail.split('\n', 1)[0])
+    return record
+
+def _info_from_record(record: Dict[str, Any]) -> str:
+    loras = " ".join(record["lora_tags"])
+    tail = record["settings_raw"]
     if loras and tail:
         return f"{loras}\n{tail}"
     return (loras or tail).strip()
 
+def extract_lora_and_steps(parameters: str) -> str:
+    if not isinstance(parameters, str):
+        return ""
+    return _info_from_record(parse_a1111_parameters(parameters, with_settings=False))
+
 def extract_prompts_from_parameters(parameters: str) -> Tuple[str, str]:
     if not isinstance(parameters, str):
         return "", ""
-    neg_match = re.search(r'Negative prompt:\s*(.*)', parameters, re.DOTALL)
-    if neg_match:
-        positive = parameters.split('Negative prompt:')[0].strip()
-        negative = neg_match.group(1).split('Steps:')[0].strip()
-        return strip_lora_tags(positive), strip_lora_tags(negative)
-    positive = parameters.split('Steps:')[0].strip()
-    return strip_lora_tags(positive), ""
+    record = parse_a1111_parameters(parameters, with_settings=False)
+    return record["positive"], record["negative"]
+
+def _index_links(all_links: Any) -> Dict[str, Tuple[str, str]]:
+    """link id -> (origin node id, target node id), accepting list and dict link formats."""
+    out: Dict[str, Tuple[str, str]] = {}
+    if not isinstance(all_links, list):
+        return out
+    for l in all_links:
+        if isinstance(l, list) and len(l) >= 4:
+            out[str(l[0])] = (str(l[1]), str(l[3]))
+        elif isinstance(l, dict) and 'id' in l:
+            out[str(l['id'])] = (str(l.get('origin_id')), str(l.get('target_id')))
+    return out
+
+def _nodes_reaching_sampler(nodes_by_id: Dict[str, Any], links_by_id: Dict[str, Tuple[str, str]]) -> set:
+    """Ids of every node with a downstream path to a sampler, in one reverse BFS."""
+    upstream: Dict[str, List[str]] = {}
+    for nid, node in nodes_by_id.items():
+        for outp in node.get('outputs') or []:
+            for link_id in (outp.get('links') or []) if isinstance(outp, dict) else []:
+                link_info = links_by_id.get(str(link_id))
+                if link_info:
+                    upstream.setdefault(link_info[1], []).append(nid)
+
+    reached = {nid for nid, node in nodes_by_id.items() if 'Sampler' in str(node.get('type', ''))}
+    stack = list(reached)
+    while stack:
+        for src in upstream.get(stack.pop(), ()):
+            if src not in reached:
+                reached.add(src)
+                stack.append(src)
+    return reached
+
+API_TEXT_KEYS = ('populated_text', 'text', 'string', 'value', 'prompt', 'wildcard_text', 'text_g', 'text_l')
+API_SINK_SLOTS = ('positive', 'negative')
+
+def _is_api_link(value: Any) -> bool:
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[0], (str, int)) and isinstance(value[1], int)
+
+def _is_api_prompt(graph: Any) -> bool:
+    return isinstance(graph, dict) and bool(graph) and all(
+        isinstance(n, dict) and 'class_type' in n for n in graph.values()
+    )
+
+def _extract_from_api_prompt(graph: Dict[str, Any]) -> Tuple[str, str]:
+    """Prompts of an API-format graph ({id: {class_type, inputs}}), classified by sampler slot.
+
+    Consumers of every node are indexed once; each text encoder is then classified by
+    the sampler/guider input (positive / negative) its conditioning finally reaches.
+    """
+    nodes = {str(k): v for k, v in graph.items() if isinstance(v, dict)}
+    consumers: Dict[str, List[Tuple[str, str]]] = {}
+    for nid, node in nodes.items():
+        for name, value in (node.get('inputs') or {}).items():
+            if _is_api_link(value):
+                consumers.setdefault(str(value[0]), []).append((nid, name))
+
+    def sink_slot(dst: str, name: str) -> Optional[str]:
+        if name in API_SINK_SLOTS:
+            return name
+        if name == 'conditioning' and 'Guider' in str(nodes.get(dst, {}).get('class_type', '')):
+            return 'positive'
+        return None
+
+    polarity: Dict[str, frozenset] = {}
+
+    def classify(start: str) -> frozenset:
+        # iterative post-order walk over consumers; nodes on the current path count as empty
+        stack = [(start, False)]
+        on_path = set()
+        while stack:
+            nid, done = stack.pop()
+            if nid in polarity:
+                continue
+            if done:
+                found = set()
+                for dst, name in consumers.get(nid, ()):
+                    slot = sink_slot(dst, name)
+                    if slot:
+                        found.add(slot)
+                    else:
+                        found.update(polarity.get(dst, ()))
+                polarity[nid] = frozenset(found)
+                on_path.discard(nid)
+                continue
+            on_path.add(nid)
+            stack.append((nid, True))
+            for dst, name in consumers.get(nid, ()):
+                if not sink_slot(dst, name) and dst not in polarity and dst not in on_path:
+                    stack.append((dst, False))
+        return polarity.get(start, frozenset())
+
+    def resolve_text(value: Any, visited: set) -> str:
+        if isinstance(value, str):
+            return value
+        if not _is_api_link(value):
+            return ""
+        src = str(value[0])
+        if src in visited or src not in nodes:
+            return ""
+        visited.add(src)
+        inputs = nodes[src].get('inputs') or {}
+        for key in API_TEXT_KEYS:
+            if isinstance(inputs.get(key), str):
+                return inputs[key]
+        return "".join(resolve_text(v, visited) for v in inputs.values() if _is_api_link(v))
+
+    pos_prompts: List[str] = []
+    neg_prompts: List[str] = []
+    for nid, node in nodes.items():
+        if 'CLIPTextEncode' not in str(node.get('class_type', '')):
+            continue
+        slots = classify(nid)
+        if not slots:
+            continue
+        inputs = node.get('inputs') or {}
+        raw = next((inputs[k] for k in ('text', 'text_g', 'text_l') if k in inputs), "")
+        prompt_text = strip_lora_tags(resolve_text(raw, {nid}))
+        if 'positive' in slots:
+            pos_prompts.append(prompt_text)
+        else:
+            neg_prompts.append(prompt_text)
+
+    return " ".join(pos_prompts).strip(), " ".join(neg_prompts).strip()
+
+UI_NODE_KEYS = ('id', 'type', 'title', 'inputs', 'outputs', 'widgets_values')
+UI_SLOT_KEYS = ('name', 'type', 'link', 'links')
+API_NODE_KEYS = ('class_type', 'inputs')
+
+def _prune_workflow_object(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """object_hook keeping only the fields the extractors read.
+
+    json calls it bottom-up as each object is completed, so node properties, sizes,
+    positions, groups and other UI state are released while parsing instead of
+    being held until the whole document is built.
+    """
+    if 'class_type' in obj:
+        return {k: obj[k] for k in API_NODE_KEYS if k in obj}
+    if 'id' in obj and 'type' in obj and ('inputs' in obj or 'outputs' in obj or 'widgets_values' in obj or 'pos' in obj):
+        return {k: obj[k] for k in UI_NODE_KEYS if k in obj}
+    if 'name' in obj and 'type' in obj and ('link' in obj or 'links' in obj):
+        return {k: obj[k] for k in UI_SLOT_KEYS if k in obj}
+    if 'nodes' in obj and 'links' in obj:
+        return {'nodes': obj['nodes'], 'links': obj['links']}
+    return obj
+
+def _load_workflow_json(workflow_str: str) -> Any:
+    if len(workflow_str) > STREAMING_PARSE_THRESHOLD:
+        return json.loads(workflow_str, object_hook=_prune_workflow_object)
+    return json.loads(workflow_str)
 
 def _extract_from_workflow_json_str(workflow_str: str) -> Tuple[str, str]:
     if not isinstance(workflow_str, str) or not workflow_str:
         return "", ""
     try:
-        wf = json.loads(workflow_str)
+        wf = _load_workflow_json(workflow_str)
     except Exception:
         return "", ""
 
     if not isinstance(wf, dict) or 'nodes' not in wf or not isinstance(wf.get('nodes'), list):
+        if _is_api_prompt(wf):
+            return _extract_from_api_prompt(wf)
         if isinstance(wf, dict):
             p = wf.get('prompt') or wf.get('positive') or ""
             n = wf.get('negative') or ""
             return strip_lora_tags(str(p)), strip_lora_tags(str(n))
         return "", ""
 
-    nodes_by_id: Dict[str, Any] = {str(n.get('id')): n for n in wf['nodes']}
-    all_links = wf.get('links', [])
+    nodes_by_id: Dict[str, Any] = {str(n.get('id')): n for n in wf['nodes'] if isinstance(n, dict)}
+    links_by_id = _index_links(wf.get('links', []))
+    reaches_sampler = _nodes_reaching_sampler(nodes_by_id, links_by_id)
 
-    def is_sampler(node: Dict[str, Any]) -> bool:
-        return isinstance(node, dict) and 'Sampler' in str(node.get('type', ''))
+    def origin_of(link_id: Any) -> Any:
+        link_info = links_by_id.get(str(link_id))
+        return nodes_by_id.get(link_info[0]) if link_info else None
 
-    def check_downstream_for_sampler(start_node: Dict[str, Any], visited=None) -> bool:
+    def resolve_text_fallback(node: Dict[str, Any], visited=None) -> str:
         if visited is None:
             visited = set()
-        sid = str(start_node.get('id'))
-        if sid in visited:
-            return False
-        visited.add(sid)
-        if is_sampler(start_node):
-            return True
-        for outp in start_node.get('outputs', []):
-            for link_id in outp.get('links', []):
-                link_info = next((l for l in all_links if str(l[0]) == str(link_id)), None)
-                if link_info:
-                    target_node = nodes_by_id.get(str(link_info[3]))
-                    if target_node and check_downstream_for_sampler(target_node, visited):
-                        return True
-        return False
-
-    def resolve_text_fallback(node: Dict[str, Any]) -> str:
+        nid = str(node.get('id'))
+        if nid in visited:
+            return ""
+        visited.add(nid)
         inputs = node.get('inputs', [])
         if not any(i.get('type') == 'STRING' and 'link' in i for i in inputs):
             widgets = node.get('widgets_values', [])
@@ -85,12 +306,9 @@ def _extract_from_workflow_json_str(workflow_str: str) -> Tuple[str, str]:
         collected = ""
         for i in inputs:
             if i.get('type') == 'STRING' and 'link' in i:
-                link_info = next((l for l in all_links if str(l[0]) == str(i['link'])), None)
-                if link_info:
-                    origin_id = str(link_info[1])
-                    origin_node = nodes_by_id.get(origin_id)
-                    if origin_node:
-                        collected += resolve_text_fallback(origin_node)
+                origin_node = origin_of(i['link'])
+                if origin_node:
+                    collected += resolve_text_fallback(origin_node, visited)
         return strip_lora_tags(collected)
 
     pos_prompts: List[str] = []
@@ -98,16 +316,12 @@ def _extract_from_workflow_json_str(workflow_str: str) -> Tuple[str, str]:
 
     for node in wf['nodes']:
         if 'CLIPTextEncode' in str(node.get('type', '')):
-            if not check_downstream_for_sampler(node):
+            if str(node.get('id')) not in reaches_sampler:
                 continue
             text_input = next((i for i in node.get('inputs', []) if i.get('name') == 'text'), None)
             if text_input and 'link' in text_input:
-                link_info = next((l for l in all_links if str(l[0]) == str(text_input['link'])), None)
-                if link_info:
-                    origin_node = nodes_by_id.get(str(link_info[1]))
-                    prompt_text = resolve_text_fallback(origin_node) if origin_node else ""
-                else:
-                    prompt_text = ""
+                origin_node = origin_of(text_input['link'])
+                prompt_text = resolve_text_fallback(origin_node) if origin_node else ""
             else:
                 prompt_text = (node.get('widgets_values') or [""])[0] if isinstance(node.get('widgets_values'), list) else ""
             prompt_text = strip_lora_tags(prompt_text)
@@ -124,13 +338,104 @@ def extract_prompts_from_metadata(meta: Dict[str, Any]) -> Tuple[str, str]:
     params = meta.get('parameters')
     if isinstance(params, str) and params.strip():
         return extract_prompts_from_parameters(params)
-    wf = meta.get('workflow') or meta.get('prompt')
-    if isinstance(wf, str) and wf.strip():
-        return _extract_from_workflow_json_str(wf)
+    graphs = [g for g in (meta.get('workflow'), meta.get('prompt')) if isinstance(g, str) and g.strip()]
+    if graphs:
+        # the UI workflow first; fall back to the API prompt graph when it yields nothing
+        for graph in graphs:
+            pos, neg = _extract_from_workflow_json_str(graph)
+            if pos or neg:
+                return pos, neg
+        return "", ""
     raw_pos = meta.get('prompt', '')
     return strip_lora_tags(str(raw_pos)), ""
 
-def collect_from_paths_json(paths_json: str) -> Tuple[str, str, str]:
+def read_file_metadata(path: str) -> Dict[str, Any]:
+    """parameters / prompt / workflow of an image; PNGs are read chunk by chunk, others through PIL."""
+    try:
+        meta = read_png_text_chunks(path, METADATA_KEYS)
+        if meta is not None:
+            return meta
+        with Image.open(path) as im:
+            return {k: im.info[k] for k in METADATA_KEYS if k in im.info}
+    except Exception:
+        return {}
+
+class _ExtractionCache:
+    """Bounded LRU of (positive, negative, info) per file, keyed by (path, size, mtime)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Tuple[str, int, int], Tuple[str, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int, int]) -> Optional[Tuple[str, str, str]]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[str, int, int], value: Tuple[str, str, str]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._data), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+_EXTRACT_CACHE = _ExtractionCache(EXTRACT_CACHE_SIZE)
+
+def extraction_cache_stats() -> Dict[str, int]:
+    return _EXTRACT_CACHE.stats()
+
+def _extract_from_meta(meta: Dict[str, Any]) -> Tuple[str, str, str]:
+    params = meta.get('parameters')
+    if isinstance(params, str) and params.strip():
+        record = parse_a1111_parameters(params, with_settings=False)
+        return record["positive"], record["negative"], _info_from_record(record)
+    pos, neg = extract_prompts_from_metadata(meta)
+    info = extract_lora_and_steps(params) if isinstance(params, str) else ""
+    return pos, neg, info
+
+def _extract_item(it: Any) -> Optional[Tuple[str, str, str]]:
+    """(positive, negative, info) for one LMM path entry, or None if it is not an image."""
+    if not isinstance(it, dict):
+        return None
+    if it.get('type') != 'image':
+        return None
+
+    meta = it.get('metadata') or {}
+    if meta or not it.get('path'):
+        return _extract_from_meta(meta)
+
+    path = it['path']
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return _extract_from_meta({})
+
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    cached = _EXTRACT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    result = _extract_from_meta(read_file_metadata(path))
+    _EXTRACT_CACHE.put(key, result)
+    return result
+
+def collect_from_paths_json(paths_json: str, workers: int = 1) -> Tuple[str, str, str]:
     positive_acc: List[str] = []
     negative_acc: List[str] = []
     info_blocks: List[str] = []
@@ -142,32 +447,21 @@ def collect_from_paths_json(paths_json: str) -> Tuple[str, str, str]:
     except Exception:
         items = []
 
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        if it.get('type') != 'image':
-            continue
-
-        meta = it.get('metadata') or {}
-        if (not meta) and it.get('path') and os.path.exists(it['path']):
-            try:
-                with Image.open(it['path']) as im:
-                    meta = {}
-                    if 'parameters' in im.info: meta['parameters'] = im.info['parameters']
-                    if 'prompt' in im.info: meta['prompt'] = im.info['prompt']
-                    if 'workflow' in im.info: meta['workflow'] = im.info['workflow']
-            except Exception:
-                meta = {}
+    workers = max(1, min(int(workers or 1), MAX_WORKERS))
+    if workers > 1 and len(items) > 1:
+        # File reads dominate; map() keeps results in input order.
+        with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+            results = list(pool.map(_extract_item, items))
+    else:
+        results = [_extract_item(it) for it in items]
 
-        pos, neg = extract_prompts_from_metadata(meta)
+    for res in results:
+        if res is None:
+            continue
+        pos, neg, info = res
         if pos: positive_acc.append(pos)
         if neg: negative_acc.append(neg)
-
-        params = meta.get('parameters')
-        if isinstance(params, str):
-            trimmed = extract_lora_and_steps(params)
-            if trimmed:
-                info_blocks.append(trimmed)
+        if info: info_blocks.append(info)
 
     positive_prompt = " ".join(positive_acc).strip()
     negative_prompt = " ".join(negative_acc).strip()
@@ -189,6 +483,9 @@ class LMMExtractPromptsNode:
         return {
             "required": {
                 "paths": ("LMM_ALL_PATHS", {"forceInput": True}),
+            },
+            "optional": {
+                "workers": ("INT", {"default": DEFAULT_WORKERS, "min": 1, "max": MAX_WORKERS, "step": 1, "tooltip": "Number of files read in parallel. 1 reads them one by one."}),
             }
         }
 
@@ -197,8 +494,8 @@ class LMMExtractPromptsNode:
     FUNCTION = "extract"
     CATEGORY = "💡Lightx02/utilities"
 
-    def extract(self, paths):
-        pos, neg, inf = collect_from_paths_json(paths)
+    def extract(self, paths, workers=DEFAULT_WORKERS):
+        pos, neg, inf = collect_from_paths_json(paths, workers)
         return (pos, neg, inf)
 
 # ----- register -----
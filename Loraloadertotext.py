@@ -1,76 +1,395 @@
 ﻿# ----- SECTION: Imports -----
+import atexit
 import hashlib
 import json
 import os
-from typing import Any, Dict, List, Optional, Tuple
+import queue
+import re
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import folder_paths
 
+from .lora_extractors import node_lora_configs, register_lora_extractor  # noqa: F401  (re-exported)
+from .lora_hash_store import CLAIM_POLL_INTERVAL, SharedHashStore
+from .lora_hashing import HASH_CHUNK_SIZE, HASH_MODES, hash_file, sha256_file
+
+# Optional server imports (for hash status API)
+try:
+    from aiohttp import web
+    from server import PromptServer
+except Exception:
+    web = None
+    PromptServer = None
+
 
 # ----- SECTION: Constants -----
 HASH_PREFIX_LEN = 10
 METADATA_FILENAME = "lora_gallery_metadata.json"
 
+# Hash mode -> key used both in the gallery metadata entries and in the hash cache.
+HASH_MODE_KEYS = {"sha256": "hash", "addnet": "addnet_hash", "quick": "quick_hash"}
+
+METADATA_SEARCH_MAX_DEPTH = 4
+METADATA_SEARCH_RETRY = 300.0
+METADATA_SEARCH_SKIP_DIRS = {
+    "__pycache__", "node_modules", "venv", "env", "site-packages",
+    "models", "checkpoints", "cache", "dist", "build",
+}
+
 _METADATA_PATH_CACHE: Optional[str] = None
+_METADATA_PATH_MISS: Optional[Tuple[int, float]] = None  # (custom_nodes mtime_ns, time of miss)
 _METADATA_CACHE: Optional[Dict[str, Any]] = None
+_METADATA_CACHE_SIG: Optional[Tuple[str, int, int]] = None
 _LORA_INDEX_CACHE: Optional[Dict[str, str]] = None
+_LORA_INDEX_SIG: Optional[int] = None
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+HASH_CACHE_FILE = os.path.join(CACHE_DIR, "lora_hash_cache.json")
+SETTINGS_FILE = os.path.join(CACHE_DIR, "lora_settings.json")
+SHARED_STORE_FILE = os.path.join(CACHE_DIR, "lora_hashes.sqlite3")
+
+_SHARED_STORE: Optional[SharedHashStore] = None
+_SHARED_STORE_READY = False
+_SHARED_STORE_LOCK = threading.Lock()
+
+# realpath -> {"name", "size", "mtime_ns", "ino", "hash", "addnet_hash", "quick_hash"}
+_HASH_CACHE: Optional[Dict[str, Dict[str, Any]]] = None
+_HASH_CACHE_LOCK = threading.RLock()
+_HASH_GENERATION = 0
+
+# hash prefix (upper case) -> realpaths, across every hash mode
+_REVERSE_INDEX: Optional[Dict[str, set]] = None
+
+METADATA_FLUSH_DELAY = 2.0
+
+HASH_WORKERS = 2
+HASH_WAIT_TIMEOUT = 30.0
+
+# node unique_id -> (hash_mode, LoRA names it printed as UNKNOWN)
+_UNRESOLVED_LORAS: Dict[str, Tuple[str, List[str]]] = {}
+
+
+# ----- SECTION: Write-Behind JSON -----
+def _atomic_write_json(path: str, data: Any, indent: Optional[int] = None) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; keep the permissions of the file being replaced
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class _JsonWriteBehind:
+    """Coalesces per-key updates to JSON dict files and flushes them together.
+
+    Updates made within ``delay`` seconds are written in a single rewrite. Each flush
+    re-reads the file and merges only the keys touched since the last flush, so
+    entries written by another execution (or another node pack) are not lost.
+    With ``merge_entries`` the queued values are partial entries: only the fields
+    given to ``update`` are written, the rest of the entry on disk is kept.
+    Files are rewritten outside ``_lock``, so ``update`` never waits on a flush;
+    flushes are serialized by ``_flush_lock`` to keep updates in order.
+    """
+
+    def __init__(self, delay: float, indent: Optional[int] = None, merge_entries: bool = True):
+        self._delay = delay
+        self._indent = indent
+        self._merge_entries = merge_entries
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._writing: Dict[str, Dict[str, Any]] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def _merge_updates(self, target: Dict[str, Any], updates: Dict[str, Any]) -> None:
+        for key, value in updates.items():
+            old = target.get(key)
+            if self._merge_entries and isinstance(old, dict) and isinstance(value, dict):
+                target[key] = {**old, **value}
+            else:
+                target[key] = value
+
+    def pending_for(self, path: str) -> Dict[str, Any]:
+        with self._lock:
+            # Updates being written right now are not on disk yet either.
+            out = dict(self._writing.get(path, {}))
+            self._merge_updates(out, self._pending.get(path, {}))
+            return out
+
+    def update(self, path: str, key: str, entry: Any) -> None:
+        if not path:
+            return
+        with self._lock:
+            value = dict(entry) if isinstance(entry, dict) else entry
+            pending = self._pending.setdefault(path, {})
+            if self._merge_entries and isinstance(pending.get(key), dict) and isinstance(value, dict):
+                pending[key].update(value)
+            else:
+                pending[key] = value
+            if self._timer is None:
+                self._timer = threading.Timer(self._delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._writing = pending
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            try:
+                for path, updates in pending.items():
+                    try:
+                        self._merge_into(path, updates)
+                    except Exception as e:
+                        print(f"[Loraloadertotext] could not write {path}: {e}")
+            finally:
+                with self._lock:
+                    self._writing = {}
+
+    def _merge_into(self, path: str, updates: Dict[str, Any]) -> None:
+        with _cross_process_lock(path):
+            self._merge_into_locked(path, updates)
+
+    def _merge_into_locked(self, path: str, updates: Dict[str, Any]) -> None:
+        current: Any = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            current = json.loads(content) if content else {}
+        except FileNotFoundError:
+            current = {}
+        if not isinstance(current, dict):
+            current = {}
+        self._merge_updates(current, updates)
+        _atomic_write_json(path, current, self._indent)
+
+
+_METADATA_WRITER = _JsonWriteBehind(METADATA_FLUSH_DELAY, indent=4)
+_HASH_CACHE_WRITER = _JsonWriteBehind(METADATA_FLUSH_DELAY, merge_entries=False)
+
+
+def flush_pending_writes() -> None:
+    _METADATA_WRITER.flush()
+    _HASH_CACHE_WRITER.flush()
+
+
+atexit.register(flush_pending_writes)
+
+
+# ----- SECTION: Settings -----
+def _load_settings() -> Dict[str, Any]:
+    try:
+        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _update_settings(**values: Any) -> None:
+    settings = _load_settings()
+    settings.update(values)
+    try:
+        _atomic_write_json(SETTINGS_FILE, settings, indent=2)
+    except Exception as e:
+        print(f"[Loraloadertotext] could not write settings: {e}")
+
+
+def set_metadata_path(path: Optional[str]) -> None:
+    """Pin the gallery metadata file to ``path`` (``None`` goes back to auto-discovery)."""
+    global _METADATA_PATH_CACHE, _METADATA_PATH_MISS
+    _update_settings(metadata_path=path or None, metadata_path_pinned=bool(path))
+    _METADATA_PATH_CACHE = path or None
+    _METADATA_PATH_MISS = None
+
+
+# ----- SECTION: Shared Store -----
+def _shared_store() -> Optional[SharedHashStore]:
+    """The machine-wide SQLite store, when enabled with ``"shared_store": true`` in the settings."""
+    global _SHARED_STORE, _SHARED_STORE_READY
+    if _SHARED_STORE_READY:
+        return _SHARED_STORE
+    with _SHARED_STORE_LOCK:
+        if _SHARED_STORE_READY:
+            return _SHARED_STORE
+        seed = False
+        settings = _load_settings()
+        if settings.get("shared_store"):
+            path = settings.get("shared_store_path") or SHARED_STORE_FILE
+            try:
+                store = SharedHashStore(path, prefixes_of=_entry_prefixes)
+                seed = store.count() == 0
+                _SHARED_STORE = store
+            except Exception as e:
+                print(f"[Loraloadertotext] shared hash store unavailable, using JSON cache: {e}")
+                _SHARED_STORE = None
+        _SHARED_STORE_READY = True
+        store = _SHARED_STORE
+    # Seeded after releasing _SHARED_STORE_LOCK, which is never held together with
+    # _HASH_CACHE_LOCK; rows written meanwhile win (put_many only inserts).
+    if seed and store is not None:
+        with _HASH_CACHE_LOCK:
+            local = list(_load_hash_cache().items())
+        try:
+            store.put_many(local)
+        except Exception as e:
+            print(f"[Loraloadertotext] shared hash store seeding failed: {e}")
+    return store
+
+
+def set_shared_store(enabled: bool, path: Optional[str] = None) -> None:
+    """Turn the shared SQLite store on or off (``path`` defaults to ``cache/lora_hashes.sqlite3``)."""
+    global _SHARED_STORE, _SHARED_STORE_READY
+    _update_settings(shared_store=bool(enabled), shared_store_path=path or None)
+    with _SHARED_STORE_LOCK:
+        _SHARED_STORE = None
+        _SHARED_STORE_READY = False
+
+
+@contextmanager
+def _cross_process_lock(name: str) -> Iterator[None]:
+    store = _shared_store()
+    if store is None:
+        yield
+        return
+    with store.exclusive(name):
+        yield
 
 
 # ----- SECTION: Helpers -----
+def _search_metadata_file(custom_nodes_dir: str) -> Optional[str]:
+    """Breadth-first search bounded by depth, skipping hidden and heavy directories."""
+    level = [custom_nodes_dir]
+    for _depth in range(METADATA_SEARCH_MAX_DEPTH):
+        nxt: List[str] = []
+        for directory in level:
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for e in entries:
+                if e.name == METADATA_FILENAME and e.is_file():
+                    return e.path
+            for e in entries:
+                if e.name.startswith(".") or e.name.lower() in METADATA_SEARCH_SKIP_DIRS:
+                    continue
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        nxt.append(e.path)
+                except OSError:
+                    continue
+        level = nxt
+        if not level:
+            break
+    return None
+
+
 def _find_metadata_file() -> Optional[str]:
-    global _METADATA_PATH_CACHE
-    if _METADATA_PATH_CACHE is not None:
+    global _METADATA_PATH_CACHE, _METADATA_PATH_MISS
+    if _METADATA_PATH_CACHE is not None and os.path.isfile(_METADATA_PATH_CACHE):
         return _METADATA_PATH_CACHE
 
+    settings = _load_settings()
+    configured = settings.get("metadata_path")
+    if isinstance(configured, str) and configured:
+        if settings.get("metadata_path_pinned") or os.path.isfile(configured):
+            _METADATA_PATH_CACHE = configured
+            return _METADATA_PATH_CACHE
+
     base = getattr(folder_paths, "base_path", None)
     if not base:
-        _METADATA_PATH_CACHE = None
         return None
 
     custom_nodes_dir = os.path.join(base, "custom_nodes")
-    if not os.path.isdir(custom_nodes_dir):
-        _METADATA_PATH_CACHE = None
+    try:
+        dir_mtime = os.stat(custom_nodes_dir).st_mtime_ns
+    except OSError:
         return None
 
-    for root, _dirs, files in os.walk(custom_nodes_dir):
-        if METADATA_FILENAME in files:
-            _METADATA_PATH_CACHE = os.path.join(root, METADATA_FILENAME)
-            return _METADATA_PATH_CACHE
+    if _METADATA_PATH_MISS is not None:
+        miss_mtime, miss_at = _METADATA_PATH_MISS
+        if miss_mtime == dir_mtime and time.monotonic() - miss_at < METADATA_SEARCH_RETRY:
+            return None
 
-    _METADATA_PATH_CACHE = None
-    return None
+    found = _search_metadata_file(custom_nodes_dir)
+    if not found:
+        _METADATA_PATH_CACHE = None
+        _METADATA_PATH_MISS = (dir_mtime, time.monotonic())
+        return None
 
+    _METADATA_PATH_CACHE = found
+    _METADATA_PATH_MISS = None
+    if configured != found:
+        _update_settings(metadata_path=found, metadata_path_pinned=False)
+    return found
 
-def _load_metadata() -> Dict[str, Any]:
-    global _METADATA_CACHE
-    if _METADATA_CACHE is not None:
-        return _METADATA_CACHE
 
+def _load_metadata() -> Dict[str, Any]:
+    global _METADATA_CACHE, _METADATA_CACHE_SIG
     path = _find_metadata_file()
-    if not path or not os.path.exists(path):
-        _METADATA_CACHE = {}
-        return _METADATA_CACHE
-
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-        data = json.loads(content) if content else {}
-        _METADATA_CACHE = data if isinstance(data, dict) else {}
-    except Exception:
-        _METADATA_CACHE = {}
+        st = os.stat(path) if path else None
+    except OSError:
+        st = None
+
+    sig = (path, st.st_mtime_ns, st.st_size) if (path and st) else None
+    if _METADATA_CACHE is not None and sig == _METADATA_CACHE_SIG:
+        return _METADATA_CACHE
 
+    data: Any = {}
+    if sig is not None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            data = json.loads(content) if content else {}
+        except Exception:
+            data = {}
+
+    metadata = data if isinstance(data, dict) else {}
+    if path:
+        for key, value in _METADATA_WRITER.pending_for(path).items():
+            if isinstance(metadata.get(key), dict) and isinstance(value, dict):
+                metadata[key].update(value)
+            else:
+                metadata[key] = value
+
+    _METADATA_CACHE = metadata
+    _METADATA_CACHE_SIG = sig
     return _METADATA_CACHE
 
 
-def _save_metadata(metadata: Dict[str, Any]) -> None:
+def _save_metadata(entry_key: str, fields: Dict[str, Any]) -> None:
+    """Queue ``fields`` for the gallery entry ``entry_key``; other fields of the
+    entry are left as they are on disk when the write is flushed."""
     path = _find_metadata_file()
-    if not path:
-        return
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=4, ensure_ascii=False)
-    except Exception:
+    if not path or not entry_key or not fields:
         return
+    _METADATA_WRITER.update(path, entry_key, fields)
 
 
 def _strip_ext(name: str) -> str:
@@ -91,33 +410,452 @@ def _format_strength(v: Any) -> str:
     return s if s else "0"
 
 
-def calculate_sha256_prefix(filepath: str) -> Optional[str]:
+def calculate_sha256_prefix(filepath: str, chunk_size: int = HASH_CHUNK_SIZE) -> Optional[str]:
     if not os.path.exists(filepath):
         return None
-    sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(chunk)
-    return sha256_hash.hexdigest()[:HASH_PREFIX_LEN]
+    digest = sha256_file(filepath, chunk_size)
+    return digest[:HASH_PREFIX_LEN] if digest else None
 
 
-def _build_lora_index() -> Dict[str, str]:
-    global _LORA_INDEX_CACHE
-    if _LORA_INDEX_CACHE is not None:
-        return _LORA_INDEX_CACHE
+# ----- SECTION: Hash Cache -----
+def _stat_signature(st: os.stat_result) -> Dict[str, int]:
+    return {"size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns), "ino": int(st.st_ino)}
 
-    idx: Dict[str, str] = {}
+
+def _load_hash_cache() -> Dict[str, Dict[str, Any]]:
+    global _HASH_CACHE
+    with _HASH_CACHE_LOCK:
+        if _HASH_CACHE is not None:
+            return _HASH_CACHE
+        data: Any = {}
+        try:
+            with open(HASH_CACHE_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+        _HASH_CACHE = {k: v for k, v in data.items() if isinstance(v, dict)} if isinstance(data, dict) else {}
+        return _HASH_CACHE
+
+
+def _hash_values_changed(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> bool:
+    if not old:
+        return False
+    return any(old.get(k) and new.get(k) and old.get(k) != new.get(k) for k in HASH_MODE_KEYS.values())
+
+
+def _store_hash_entry(real: str, entry: Dict[str, Any], persist: bool = True) -> None:
+    global _HASH_GENERATION
+    with _HASH_CACHE_LOCK:
+        cache = _load_hash_cache()
+        old = cache.get(real)
+        cache[real] = entry
+        # Only a hash that differs from the one we handed out before can change
+        # a node's output; new, seeded or store-synced entries leave it alone.
+        if persist and _hash_values_changed(old, entry):
+            _HASH_GENERATION += 1
+        if _REVERSE_INDEX is not None:
+            _reverse_index_remove(real, old)
+            _reverse_index_add(real, entry)
+    if not persist:
+        return
+    store = _shared_store()
+    if store is not None:
+        try:
+            store.put(real, entry)
+            return
+        except Exception as e:
+            print(f"[Loraloadertotext] shared hash store write failed: {e}")
+    _HASH_CACHE_WRITER.update(HASH_CACHE_FILE, real, entry)
+
+
+def _valid_cache_entry(real: str) -> Tuple[Optional[Dict[str, int]], Optional[Dict[str, Any]]]:
+    try:
+        sig = _stat_signature(os.stat(real))
+    except OSError:
+        return None, None
+    with _HASH_CACHE_LOCK:
+        entry = _load_hash_cache().get(real)
+        if entry and all(entry.get(k) == v for k, v in sig.items()):
+            return sig, entry
+
+    # Another process may already have hashed this file.
+    store = _shared_store()
+    shared = store.get(real) if store is not None else None
+    if shared and all(shared.get(k) == v for k, v in sig.items()):
+        _store_hash_entry(real, shared, persist=False)
+        return sig, shared
+    return sig, None
+
+
+def _peek_cached_hash(full_path: str, mode: str = "sha256") -> Optional[str]:
+    _sig, entry = _valid_cache_entry(os.path.realpath(full_path))
+    h = entry.get(HASH_MODE_KEYS.get(mode, "hash")) if entry else None
+    return h if isinstance(h, str) and h else None
+
+
+def _compute_hash(real: str, mode: str) -> Optional[str]:
+    if mode == "sha256":
+        return calculate_sha256_prefix(real)
+    digest = hash_file(real, mode)
+    return digest[:HASH_PREFIX_LEN] if digest else None
+
+
+def _usable_hash(entry: Optional[Dict[str, Any]], mode: str, verify: bool) -> Optional[str]:
+    h = entry.get(HASH_MODE_KEYS.get(mode, "hash")) if entry else None
+    if not isinstance(h, str) or not h:
+        return None
+    if verify and entry.get("unverified") == mode:
+        return None
+    return h
+
+
+def _cached_file_hash(
+    full_path: str, lora_name: str = "", seed_hash: str = "", mode: str = "sha256", verify: bool = False
+) -> Optional[str]:
+    """Return the ``mode`` hash of ``full_path``, re-hashing only when its stat signature changed.
+
+    A hit costs one ``stat()``. ``seed_hash`` (a hash already known from the gallery
+    metadata) is used right away for files the cache has never seen, so upgrading
+    does not block on a full re-hash of every LoRA; the entry is marked unverified
+    and queued for a background re-hash (``verify=True``), which replaces the seed
+    if the file was swapped before the cache knew it.
+    """
+    real = os.path.realpath(full_path)
+    key = HASH_MODE_KEYS.get(mode, "hash")
+    sig, entry = _valid_cache_entry(real)
+    if sig is None:
+        return None
+    if entry is not None:
+        h = _usable_hash(entry, mode, verify)
+        if h:
+            return h
+    else:
+        store = _shared_store()
+        with _HASH_CACHE_LOCK:
+            unseen = real not in _load_hash_cache()
+        if unseen and store is not None:
+            unseen = store.get(real) is None
+        if unseen and seed_hash and not verify:
+            _store_hash_entry(real, {"name": lora_name, **sig, key: seed_hash.lower(), "unverified": mode})
+            _HASH_POOL.submit(real, lora_name, "", mode, verify=True)
+            return seed_hash.lower()
+
+    store = _shared_store()
+    if store is not None:
+        # Only one process per machine hashes a given file; the others wait for its row.
+        while not store.claim(real, mode):
+            time.sleep(CLAIM_POLL_INTERVAL)
+            _sig, entry = _valid_cache_entry(real)
+            h = _usable_hash(entry, mode, verify)
+            if h:
+                return h
+        try:
+            _sig, entry = _valid_cache_entry(real)
+            h = _usable_hash(entry, mode, verify)
+            if h:
+                return h
+            computed = _compute_hash(real, mode)
+        finally:
+            store.release(real, mode)
+    else:
+        computed = _compute_hash(real, mode)
+    if not computed:
+        return None
+
+    # Keep hashes of other modes only while the file is unchanged.
+    with _HASH_CACHE_LOCK:
+        current = _load_hash_cache().get(real)
+        if current and all(current.get(k) == v for k, v in sig.items()):
+            stored = dict(current)
+        else:
+            stored = {"name": lora_name, **sig}
+        stored[key] = computed
+        if stored.get("unverified") == mode:
+            del stored["unverified"]
+    # Outside the cache lock: the store write may wait on another process.
+    _store_hash_entry(real, stored)
+    return computed
+
+
+# ----- SECTION: Reverse Hash Index -----
+_REFERENCE_LINE_RE = re.compile(r"^\s*(?P<name>.+?):\s*(?P<hash>[0-9A-Fa-f]{6,64}|UNKNOWN)\s*:\s*(?P<strength>[-+0-9.eE]+)\s*,?\s*$")
+
+
+def _entry_prefixes(entry: Optional[Dict[str, Any]]) -> List[str]:
+    if not isinstance(entry, dict):
+        return []
+    out = []
+    for key in HASH_MODE_KEYS.values():
+        h = entry.get(key)
+        if isinstance(h, str) and h:
+            out.append(h[:HASH_PREFIX_LEN].upper())
+    return out
+
+
+def _reverse_index_add(real: str, entry: Optional[Dict[str, Any]]) -> None:
+    for prefix in _entry_prefixes(entry):
+        _REVERSE_INDEX.setdefault(prefix, set()).add(real)
+
+
+def _reverse_index_remove(real: str, entry: Optional[Dict[str, Any]]) -> None:
+    for prefix in _entry_prefixes(entry):
+        paths = _REVERSE_INDEX.get(prefix)
+        if paths is None:
+            continue
+        paths.discard(real)
+        if not paths:
+            del _REVERSE_INDEX[prefix]
+
+
+def _reverse_index() -> Dict[str, set]:
+    global _REVERSE_INDEX
+    with _HASH_CACHE_LOCK:
+        if _REVERSE_INDEX is None:
+            _REVERSE_INDEX = {}
+            for real, entry in _load_hash_cache().items():
+                _reverse_index_add(real, entry)
+        return _REVERSE_INDEX
+
+
+def _sync_store_prefix(h: str) -> None:
+    """Pull rows hashed by other processes into the local cache and reverse index."""
+    store = _shared_store()
+    if store is None:
+        return
+    try:
+        rows = store.find_by_prefix(h[:HASH_PREFIX_LEN])
+    except Exception as e:
+        print(f"[Loraloadertotext] shared hash store lookup failed: {e}")
+        return
+    for real, entry in rows:
+        with _HASH_CACHE_LOCK:
+            if _load_hash_cache().get(real) == entry:
+                continue
+        _store_hash_entry(real, entry, persist=False)
+
+
+def find_loras_by_hash(hash_prefix: str) -> List[str]:
+    """LoRA names whose cached hash (any mode) starts with ``hash_prefix``.
+
+    Full-length prefixes are a single dict lookup; shorter ones fall back to a scan.
+    With the shared store enabled, its prefix index is consulted first so files
+    hashed by other processes are found too.
+    """
+    h = (hash_prefix or "").strip().upper()
+    if not h or h == "UNKNOWN":
+        return []
+    _sync_store_prefix(h)
+    with _HASH_CACHE_LOCK:
+        idx = _reverse_index()
+        if len(h) >= HASH_PREFIX_LEN:
+            paths = set(idx.get(h[:HASH_PREFIX_LEN], ()))
+        else:
+            paths = set()
+            for prefix, reals in idx.items():
+                if prefix.startswith(h):
+                    paths.update(reals)
+        cache = _load_hash_cache()
+        names = [(cache.get(real) or {}).get("name") or real for real in paths]
+    return sorted(names)
+
+
+def resolve_lora_references(text: str) -> List[Dict[str, Any]]:
+    """Resolve ``name: HASH:strength,`` lines (this node's output format) to local files."""
+    out: List[Dict[str, Any]] = []
+    for line in (text or "").splitlines():
+        m = _REFERENCE_LINE_RE.match(line)
+        if not m:
+            continue
+        name = m.group("name").strip()
+        files = find_loras_by_hash(m.group("hash"))
+        if not files:
+            resolved = _resolve_lora_filename(name)
+            files = [resolved] if resolved else []
+        out.append({"name": name, "hash": m.group("hash").upper(), "strength": m.group("strength"), "files": files})
+    return out
+
+
+# ----- SECTION: Background Hashing -----
+class _LoraHashWorkerPool:
+    """Bounded pool of daemon threads hashing LoRA files off the executor thread.
+
+    Requests for the same file are coalesced onto a single ``Future``. Threads are
+    enough here: ``hashlib`` releases the GIL while digesting large buffers.
+    ``run`` takes a job that is still queued over on the caller's thread, so a
+    node waiting for one LoRA never sits behind the whole warm-up queue.
+    """
+
+    def __init__(self, workers: int):
+        self._workers = max(1, int(workers))
+        self._queue: "queue.Queue[Tuple[str, str, str, str, bool, Future]]" = queue.Queue()
+        self._pending: Dict[Tuple[str, str, bool], Future] = {}
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _ensure_started(self) -> None:
+        if len(self._threads) >= self._workers:
+            return
+        for i in range(len(self._threads), self._workers):
+            t = threading.Thread(target=self._run, name=f"lora-hash-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(
+        self, full_path: str, lora_name: str = "", seed_hash: str = "", mode: str = "sha256", verify: bool = False
+    ) -> Future:
+        real = os.path.realpath(full_path)
+        job = (real, mode, verify)
+        with self._lock:
+            fut = self._pending.get(job)
+            if fut is not None:
+                return fut
+            fut = Future()
+            self._pending[job] = fut
+            self.submitted += 1
+            self._ensure_started()
+        self._queue.put((real, lora_name, seed_hash, mode, verify, fut))
+        return fut
+
+    def run(
+        self,
+        full_path: str,
+        lora_name: str = "",
+        seed_hash: str = "",
+        mode: str = "sha256",
+        verify: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Optional[str]:
+        """Hash on the caller's thread unless a worker already started this job; then wait for it."""
+        real = os.path.realpath(full_path)
+        job = (real, mode, verify)
+        with self._lock:
+            fut = self._pending.get(job)
+            if fut is None:
+                fut = Future()
+                self._pending[job] = fut
+                self.submitted += 1
+            # A queued job is taken over here; the worker skips it when it comes up.
+            owned = not (fut.running() or fut.done()) and fut.set_running_or_notify_cancel()
+        if owned:
+            self._execute(job, lora_name, seed_hash, fut)
+            timeout = 0
+        try:
+            return fut.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def _run(self) -> None:
+        while True:
+            real, lora_name, seed_hash, mode, verify, fut = self._queue.get()
+            with self._lock:
+                if fut.running() or fut.done() or not fut.set_running_or_notify_cancel():
+                    continue
+            self._execute((real, mode, verify), lora_name, seed_hash, fut)
+
+    def _execute(self, job: Tuple[str, str, bool], lora_name: str, seed_hash: str, fut: Future) -> None:
+        real, mode, verify = job
+        ok = False
+        try:
+            h = _cached_file_hash(real, lora_name, seed_hash, mode, verify)
+            ok = bool(h)
+            fut.set_result(h)
+        except Exception as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                if self._pending.get(job) is fut:
+                    del self._pending[job]
+                self.completed += 1
+                if not ok:
+                    self.failed += 1
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "pending": len(self._pending),
+            }
+
+
+_HASH_POOL = _LoraHashWorkerPool(HASH_WORKERS)
+_KNOWN_LORA_FILES: set = set()
+_PREWARM_LOCK = threading.Lock()
+
+
+def prewarm_lora_hashes() -> int:
+    """Queue every LoRA not seen before for background hashing (or for verification,
+    when its cached hash was only seeded from the gallery); returns how many were queued."""
+    try:
+        files = folder_paths.get_filename_list("loras")
+    except Exception:
+        return 0
+
+    with _PREWARM_LOCK:
+        new_files = [fn for fn in files if fn not in _KNOWN_LORA_FILES]
+        _KNOWN_LORA_FILES.update(new_files)
+    if not new_files:
+        return 0
+
+    metadata = _load_metadata()
+    queued = 0
+    for fn in new_files:
+        full_path = folder_paths.get_full_path("loras", fn)
+        if not full_path:
+            continue
+        _sig, entry = _valid_cache_entry(os.path.realpath(full_path))
+        if entry and entry.get("unverified") in HASH_MODE_KEYS:
+            _HASH_POOL.submit(full_path, fn, "", entry["unverified"], verify=True)
+        elif _usable_hash(entry, "sha256", False):
+            continue
+        else:
+            _HASH_POOL.submit(full_path, fn, _lookup_hash(metadata, fn))
+        queued += 1
+    return queued
+
+
+def _wait_for_hash(full_path: str, lora_name: str, seed_hash: str = "", mode: str = "sha256") -> Optional[str]:
+    return _HASH_POOL.run(full_path, lora_name, seed_hash, mode, timeout=HASH_WAIT_TIMEOUT)
+
+
+def lora_hash_status() -> Dict[str, Any]:
+    status = _HASH_POOL.status()
+    with _PREWARM_LOCK:
+        status["known"] = len(_KNOWN_LORA_FILES)
+    with _HASH_CACHE_LOCK:
+        status["cached"] = len(_load_hash_cache())
+    store = _shared_store()
+    status["shared_store"] = store.path if store is not None else None
+    return status
+
+
+def _build_lora_index() -> Dict[str, str]:
+    global _LORA_INDEX_CACHE, _LORA_INDEX_SIG
+    # folder_paths already revalidates its listing against the folders' mtimes,
+    # so the index only needs rebuilding when that listing changes.
     try:
         files = folder_paths.get_filename_list("loras")
     except Exception:
         files = []
 
+    sig = hash(tuple(files))
+    if _LORA_INDEX_CACHE is not None and sig == _LORA_INDEX_SIG:
+        return _LORA_INDEX_CACHE
+
+    idx: Dict[str, str] = {}
+
     for fn in files:
         base = _strip_ext(fn).lower()
         if base and base not in idx:
             idx[base] = fn
 
     _LORA_INDEX_CACHE = idx
+    _LORA_INDEX_SIG = sig
     return _LORA_INDEX_CACHE
 
 
@@ -141,10 +879,10 @@ def _resolve_lora_filename(lora_name: str) -> Optional[str]:
     return None
 
 
-def _hash_from_metadata_entry(entry: Any) -> str:
+def _hash_from_metadata_entry(entry: Any, key: str = "hash") -> str:
     if not isinstance(entry, dict):
         return ""
-    h = entry.get("hash")
+    h = entry.get(key)
     if not isinstance(h, str) or not h.strip():
         return ""
     hs = h.strip()
@@ -153,7 +891,7 @@ def _hash_from_metadata_entry(entry: Any) -> str:
     return hs.upper()
 
 
-def _lookup_hash(metadata: Dict[str, Any], lora_name: str) -> str:
+def _lookup_hash(metadata: Dict[str, Any], lora_name: str, key: str = "hash") -> str:
     if not isinstance(metadata, dict) or not lora_name:
         return ""
 
@@ -166,41 +904,37 @@ def _lookup_hash(metadata: Dict[str, Any], lora_name: str) -> str:
         candidates.append(resolved)
         candidates.append(_strip_ext(resolved))
 
-    for key in candidates:
-        entry = metadata.get(key)
-        h = _hash_from_metadata_entry(entry)
+    for candidate in candidates:
+        h = _hash_from_metadata_entry(metadata.get(candidate), key)
         if h:
             return h
 
     return ""
 
 
-def _get_or_compute_hash(metadata: Dict[str, Any], lora_name: str) -> str:
-    existing = _lookup_hash(metadata, lora_name)
-    if existing:
-        return existing
+def _get_or_compute_hash(metadata: Dict[str, Any], lora_name: str, mode: str = "sha256") -> str:
+    key = HASH_MODE_KEYS.get(mode, "hash")
+    existing = _lookup_hash(metadata, lora_name, key)
 
     resolved = _resolve_lora_filename(lora_name)
-    if not resolved:
-        return ""
-
-    full_path = folder_paths.get_full_path("loras", resolved)
+    full_path = folder_paths.get_full_path("loras", resolved) if resolved else None
     if not full_path:
-        return ""
+        return existing
 
-    computed = calculate_sha256_prefix(full_path)
+    computed = _peek_cached_hash(full_path, mode) or _wait_for_hash(full_path, resolved, existing, mode)
     if not computed:
-        return ""
+        return existing
 
-    computed_store = computed
-    computed_out = computed.upper()
+    computed_out = computed[:HASH_PREFIX_LEN].upper()
+    if computed_out == existing:
+        return computed_out
 
     if isinstance(metadata, dict):
         entry_key = resolved
         if entry_key not in metadata or not isinstance(metadata.get(entry_key), dict):
             metadata[entry_key] = {}
-        metadata[entry_key]["hash"] = computed_store
-        _save_metadata(metadata)
+        metadata[entry_key][key] = computed
+        _save_metadata(entry_key, {key: computed})
 
     return computed_out
 
@@ -222,84 +956,95 @@ def _get_upstream_node_id_from_model_input(prompt: Dict[str, Any], this_node_id:
     return None
 
 
-def _is_rgthree_power_lora_loader(class_type: str) -> bool:
-    ct = (class_type or "").strip()
-    if not ct:
-        return False
-    lowered = ct.lower()
-    if lowered == "rgthreepowerloraloader":
-        return True
-    if lowered == "power lora loader":
-        return True
-    if "power" in lowered and "lora" in lowered and "loader" in lowered:
-        return True
-    return False
-
-
-def _extract_configs_from_rgthree_node(prompt_node: Dict[str, Any]) -> List[Dict[str, Any]]:
-    inputs = prompt_node.get("inputs") or {}
-    result: List[Dict[str, Any]] = []
-
-    for name, value in inputs.items():
-        if not isinstance(name, str):
-            continue
-        if not name.startswith("lora_"):
-            continue
-        if not isinstance(value, dict):
-            continue
-        if not value.get("on", False):
-            continue
-        if "lora" not in value or "strength" not in value:
-            continue
-
-        lora_name = value.get("lora")
-        if not isinstance(lora_name, str) or not lora_name.strip():
-            continue
-
-        strength = value.get("strength", 1.0)
-        result.append(
-            {
-                "on": True,
-                "lora": lora_name.strip(),
-                "strength": float(strength) if isinstance(strength, (int, float, str)) else 1.0,
-            }
-        )
-
-    return result
+def _model_input_source(prompt_node: Dict[str, Any]) -> Optional[str]:
+    nxt = (prompt_node.get("inputs") or {}).get("model")
+    if isinstance(nxt, (list, tuple)) and len(nxt) >= 1:
+        return str(nxt[0])
+    return None
 
 
-def _extract_selection_data_from_local_lora_gallery(prompt_node: Dict[str, Any]) -> str:
-    inputs = prompt_node.get("inputs") or {}
-    sel = inputs.get("selection_data")
-    if isinstance(sel, str) and sel.strip():
-        return sel
-    return "[]"
+class _PromptLoraIndex:
+    """Per-prompt memo of the LoRA stack applied along each node's ``model`` chain.
+
+    Chains are walked iteratively with a visited set, and every node on a walked
+    chain is memoized, so several Loraloadertotext nodes sharing a stack only
+    traverse it once. Configs are returned in application order (closest to the
+    checkpoint first).
+    """
+
+    def __init__(self, prompt: Dict[str, Any]):
+        self.prompt = prompt
+        self._chains: Dict[str, List[Dict[str, Any]]] = {}
+
+    def configs_for(self, node_id: Any) -> List[Dict[str, Any]]:
+        path: List[str] = []
+        visited = set()
+        base: List[Dict[str, Any]] = []
+        cur: Optional[str] = str(node_id)
+        while cur is not None and cur not in visited:
+            if cur in self._chains:
+                base = self._chains[cur]
+                break
+            node = _get_node(self.prompt, cur)
+            if not isinstance(node, dict):
+                break
+            visited.add(cur)
+            path.append(cur)
+            cur = _model_input_source(node)
+
+        for nid in reversed(path):
+            own = node_lora_configs(self.prompt[nid])
+            base = base + own if own else base
+            self._chains[nid] = base
+        return list(base)
+
+
+_PROMPT_INDEX_SIZE = 4
+_PROMPT_INDEXES: List[_PromptLoraIndex] = []
+_PROMPT_INDEX_LOCK = threading.Lock()
+
+
+def _prompt_index(prompt: Dict[str, Any]) -> _PromptLoraIndex:
+    # ComfyUI passes the same prompt object to every node of one execution, so
+    # identity stands in for the prompt id, which nodes do not receive.
+    with _PROMPT_INDEX_LOCK:
+        for idx in _PROMPT_INDEXES:
+            if idx.prompt is prompt:
+                return idx
+        idx = _PromptLoraIndex(prompt)
+        _PROMPT_INDEXES.insert(0, idx)
+        del _PROMPT_INDEXES[_PROMPT_INDEX_SIZE:]
+        return idx
 
 
 def _extract_loras_from_upstream(prompt: Dict[str, Any], node_id: str) -> List[Dict[str, Any]]:
-    node = _get_node(prompt, node_id)
-    if not node:
+    if not isinstance(prompt, dict):
         return []
+    return _prompt_index(prompt).configs_for(node_id)
 
-    class_type = str(node.get("class_type") or "")
 
-    if class_type in {"LocalLoraGallery", "LocalLoraGalleryModelOnly"}:
-        selection_data = _extract_selection_data_from_local_lora_gallery(node)
-        try:
-            configs = json.loads(selection_data) if selection_data else []
-        except Exception:
-            configs = []
-        return configs if isinstance(configs, list) else []
-
-    if _is_rgthree_power_lora_loader(class_type):
-        return _extract_configs_from_rgthree_node(node)
-
-    inputs = node.get("inputs") or {}
-    nxt = inputs.get("model")
-    if isinstance(nxt, (list, tuple)) and len(nxt) >= 1:
-        return _extract_loras_from_upstream(prompt, str(nxt[0]))
-
-    return []
+def _upstream_configs(prompt: Dict[str, Any], unique_id: Any) -> List[Dict[str, Any]]:
+    upstream_id = _get_upstream_node_id_from_model_input(prompt, unique_id)
+    if not upstream_id:
+        return []
+    configs = _extract_loras_from_upstream(prompt, upstream_id)
+    return configs if isinstance(configs, list) else []
+
+
+def _has_late_hash(unique_id: Any) -> bool:
+    """Whether a LoRA that ``unique_id`` (any node, when unknown) printed as UNKNOWN now has a cached hash."""
+    if unique_id is not None:
+        found = _UNRESOLVED_LORAS.get(str(unique_id))
+        pending = [found] if found else []
+    else:
+        pending = list(_UNRESOLVED_LORAS.values())
+    for mode, names in pending:
+        for lora_name in names:
+            resolved = _resolve_lora_filename(lora_name)
+            full_path = folder_paths.get_full_path("loras", resolved) if resolved else None
+            if full_path and _peek_cached_hash(full_path, mode):
+                return True
+    return False
 
 
 # ----- SECTION: Node -----
@@ -310,6 +1055,9 @@ class Loraloadertotext:
             "required": {
                 "model": ("MODEL",),
             },
+            "optional": {
+                "hash_mode": (list(HASH_MODES), {"default": "sha256", "tooltip": "sha256: full file (gallery compatible). addnet: safetensors tensor data only. quick: header plus two data windows, very low I/O on large files."}),
+            },
             "hidden": {
                 "unique_id": "UNIQUE_ID",
                 "prompt": "PROMPT",
@@ -322,24 +1070,32 @@ class Loraloadertotext:
     CATEGORY = "💡Lightx02/Metadata"
 
     @classmethod
-    def IS_CHANGED(cls, **kwargs):
-        return float("NaN")
+    def IS_CHANGED(cls, hash_mode="sha256", unique_id=None, **kwargs):
+        # Upstream LoRA configs are already part of ComfyUI's ancestor input
+        # signature (and the hidden PROMPT is not resolved here), so only what
+        # can change behind the graph's back is fingerprinted.
+        if _has_late_hash(unique_id):
+            # A LoRA printed as UNKNOWN last run has been hashed since.
+            return float("nan")
+        _load_metadata()
+        payload = {
+            "hash_mode": hash_mode,
+            "generation": _HASH_GENERATION,
+            "metadata": _METADATA_CACHE_SIG,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
 
-    def extract(self, model, unique_id=None, prompt=None) -> Tuple[str]:
+    def extract(self, model, hash_mode="sha256", unique_id=None, prompt=None) -> Tuple[str]:
         if not isinstance(prompt, dict) or unique_id is None:
             return ("",)
 
-        upstream_id = _get_upstream_node_id_from_model_input(prompt, unique_id)
-        if not upstream_id:
-            return ("",)
-
-        configs = _extract_loras_from_upstream(prompt, upstream_id)
-        if not isinstance(configs, list):
-            configs = []
+        configs = _upstream_configs(prompt, unique_id)
 
+        prewarm_lora_hashes()
         metadata = _load_metadata()
 
         out_lines: List[str] = []
+        unresolved: List[str] = []
         for cfg in configs:
             if not isinstance(cfg, dict):
                 continue
@@ -354,10 +1110,17 @@ class Loraloadertotext:
             if strength in {"0", "0.0"}:
                 continue
 
-            h = _get_or_compute_hash(metadata, lora_name) or "UNKNOWN"
+            h = _get_or_compute_hash(metadata, lora_name, hash_mode)
+            if not h:
+                h = "UNKNOWN"
+                unresolved.append(lora_name)
             display_name = _strip_ext(lora_name)
             out_lines.append(f"{display_name}: {h}:{strength},")
 
+        if unresolved:
+            _UNRESOLVED_LORAS[str(unique_id)] = (hash_mode, unresolved)
+        else:
+            _UNRESOLVED_LORAS.pop(str(unique_id), None)
         return ("\n".join(out_lines),)
 
 
@@ -368,4 +1131,65 @@ NODE_CLASS_MAPPINGS = {
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "Loraloadertotext": "📄 LoRA Loader → Selected LoRAs (Text)",
-}
\ No newline at end of file
+}
+
+
+# ----- SECTION: Hash Status API -----
+if PromptServer and web and hasattr(PromptServer, "instance"):
+    routes = PromptServer.instance.routes
+
+    @routes.get("/extensions/lightx02/lora-hash/status")
+    async def lora_hash_status_route(request):
+        if request.query.get("rescan") in {"1", "true"}:
+            prewarm_lora_hashes()
+        return web.json_response(lora_hash_status())
+
+    @routes.post("/extensions/lightx02/lora-hash/resolve")
+    async def lora_hash_resolve_route(request):
+        data = await request.json()
+        if not isinstance(data, dict):
+            return web.json_response({"ok": False, "error": "invalid payload"}, status=400)
+        hashes = data.get("hashes") or []
+        result: Dict[str, Any] = {"ok": True}
+        if isinstance(hashes, list):
+            result["hashes"] = {str(h): find_loras_by_hash(str(h)) for h in hashes}
+        if isinstance(data.get("text"), str):
+            result["references"] = resolve_lora_references(data["text"])
+        return web.json_response(result)
+
+    @routes.get("/extensions/lightx02/lora-hash/metadata-path")
+    async def lora_metadata_path_route(request):
+        return web.json_response({"path": _find_metadata_file(), "pinned": bool(_load_settings().get("metadata_path_pinned"))})
+
+    @routes.post("/extensions/lightx02/lora-hash/metadata-path")
+    async def lora_set_metadata_path_route(request):
+        data = await request.json()
+        path = data.get("path") if isinstance(data, dict) else None
+        if path is not None and not isinstance(path, str):
+            return web.json_response({"ok": False, "error": "invalid path"}, status=400)
+        set_metadata_path(path)
+        return web.json_response({"ok": True, "path": _find_metadata_file()})
+
+    @routes.get("/extensions/lightx02/lora-hash/shared-store")
+    async def lora_shared_store_route(request):
+        store = _shared_store()
+        settings = _load_settings()
+        return web.json_response({
+            "enabled": bool(settings.get("shared_store")),
+            "path": store.path if store is not None else settings.get("shared_store_path"),
+            "active": store is not None,
+        })
+
+    @routes.post("/extensions/lightx02/lora-hash/shared-store")
+    async def lora_set_shared_store_route(request):
+        data = await request.json()
+        if not isinstance(data, dict):
+            return web.json_response({"ok": False, "error": "invalid payload"}, status=400)
+        path = data.get("path")
+        if path is not None and not isinstance(path, str):
+            return web.json_response({"ok": False, "error": "invalid path"}, status=400)
+        set_shared_store(bool(data.get("enabled")), path)
+        store = _shared_store()
+        return web.json_response({"ok": True, "active": store is not None, "path": store.path if store is not None else None})
+
+threading.Thread(target=prewarm_lora_hashes, name="lora-hash-prewarm", daemon=True).start()
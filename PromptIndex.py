@@ -0,0 +1,361 @@
+# Developed by Light-x02
+# https://github.com/Light-x02/ComfyUI-Lightx02-Node
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import folder_paths
+
+try:
+    from .LMMExtractPromptsNode import (
+        extract_lora_and_steps,
+        extract_prompts_from_metadata,
+        parse_a1111_parameters,
+        read_file_metadata,
+    )
+except ImportError:
+    from LMMExtractPromptsNode import (
+        extract_lora_and_steps,
+        extract_prompts_from_metadata,
+        parse_a1111_parameters,
+        read_file_metadata,
+    )
+
+try:
+    from .lora_extractors import node_lora_configs
+except ImportError:
+    from lora_extractors import node_lora_configs
+
+# Optional server imports (for search API)
+try:
+    from aiohttp import web
+    from server import PromptServer
+except Exception:
+    web = None
+    PromptServer = None
+
+# ----- constants -----
+
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "cache", "prompt_index.sqlite3")
+IMAGE_EXTENSIONS = {".png", ".webp", ".jpg", ".jpeg"}
+SEARCH_FIELDS = ["all", "positive", "negative", "loras", "settings"]
+COMMIT_EVERY = 500
+SCHEMA_VERSION = 5
+
+_CRAWL_LOCK = threading.Lock()
+_FTS_AVAILABLE: Optional[bool] = None
+_LAST_CRAWL: Dict[str, Any] = {}
+
+# ----- storage -----
+
+def _connect() -> sqlite3.Connection:
+    global _FTS_AVAILABLE
+    os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+    db = sqlite3.connect(INDEX_PATH, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        # Older layout: the index is only a cache, rebuild it from scratch
+        for table in ("files_fts", "files", "dirs"):
+            db.execute(f"DROP TABLE IF EXISTS {table}")
+        db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    # ``settings`` holds the searchable "key: value" text, ``settings_json`` the parsed dict
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS files ("
+        "path TEXT PRIMARY KEY, root TEXT, dir TEXT, size INTEGER, mtime_ns INTEGER, "
+        "positive TEXT, negative TEXT, loras TEXT, settings TEXT, settings_json TEXT, info TEXT)"
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS files_dir ON files (dir)")
+    db.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, root TEXT, mtime_ns INTEGER)")
+    if _FTS_AVAILABLE is None:
+        try:
+            # External content: the FTS rows are keyed by files.rowid, so updates
+            # and deletes are rowid lookups instead of scans of the FTS table.
+            db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5("
+                "positive, negative, loras, settings, content='files', content_rowid='rowid')"
+            )
+            _FTS_AVAILABLE = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE
+            _FTS_AVAILABLE = False
+    return db
+
+def _delete_file(db: sqlite3.Connection, path: str) -> None:
+    if _FTS_AVAILABLE:
+        row = db.execute(
+            "SELECT rowid, positive, negative, loras, settings FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None:
+            db.execute(
+                "INSERT INTO files_fts (files_fts, rowid, positive, negative, loras, settings) "
+                "VALUES ('delete', ?, ?, ?, ?, ?)",
+                row,
+            )
+    db.execute("DELETE FROM files WHERE path = ?", (path,))
+
+def _graph_lora_tags(prompt_json: Any) -> List[str]:
+    """``<lora:name:strength>`` tags for the LoRA loader nodes of an API-format prompt
+    graph (what ComfyUI itself embeds), using the Loraloadertotext extractors."""
+    if not isinstance(prompt_json, str) or not prompt_json.strip():
+        return []
+    try:
+        graph = json.loads(prompt_json)
+    except ValueError:
+        return []
+    if not isinstance(graph, dict):
+        return []
+    tags: List[str] = []
+    for node in graph.values():
+        if not isinstance(node, dict):
+            continue
+        for config in node_lora_configs(node):
+            name = config.get("lora") if isinstance(config, dict) else None
+            if not isinstance(name, str) or not name.strip() or config.get("on") is False:
+                continue
+            stem = os.path.splitext(os.path.basename(name.strip().replace("\\", "/")))[0]
+            try:
+                strength = float(config.get("strength", 1.0))
+            except (TypeError, ValueError):
+                strength = 1.0
+            tag = f"<lora:{stem}:{strength:g}>"
+            if tag not in tags:
+                tags.append(tag)
+    return tags
+
+def _index_file(db: sqlite3.Connection, root: str, directory: str, path: str, st: os.stat_result, known: bool) -> None:
+    meta = read_file_metadata(path)
+    positive, negative = extract_prompts_from_metadata(meta)
+    params = meta.get("parameters") if isinstance(meta.get("parameters"), str) else ""
+    record = parse_a1111_parameters(params) if params else {"lora_tags": [], "settings": {}}
+    info = extract_lora_and_steps(params) if params else ""
+    lora_tags = list(record["lora_tags"])
+    lora_tags += [t for t in _graph_lora_tags(meta.get("prompt")) if t not in lora_tags]
+    loras = " ".join(lora_tags)
+    settings = " ".join(f"{k}: {v}" for k, v in record["settings"].items())
+    settings_json = json.dumps(record["settings"], ensure_ascii=False)
+
+    if known:
+        _delete_file(db, path)
+    cur = db.execute(
+        "INSERT INTO files (path, root, dir, size, mtime_ns, positive, negative, loras, settings, settings_json, info) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (path, root, directory, st.st_size, st.st_mtime_ns, positive, negative, loras, settings, settings_json, info),
+    )
+    if _FTS_AVAILABLE:
+        db.execute(
+            "INSERT INTO files_fts (rowid, positive, negative, loras, settings) VALUES (?, ?, ?, ?, ?)",
+            (cur.lastrowid, positive, negative, loras, settings),
+        )
+
+# ----- crawl -----
+
+def _default_roots() -> List[str]:
+    roots = []
+    for getter in (folder_paths.get_output_directory, folder_paths.get_input_directory):
+        try:
+            d = getter()
+        except Exception:
+            continue
+        if d and os.path.isdir(d):
+            roots.append(os.path.abspath(d))
+    return roots
+
+def _walk(root: str) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        files = []
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    if not e.name.startswith("."):
+                        stack.append(e.path)
+                elif os.path.splitext(e.name)[1].lower() in IMAGE_EXTENSIONS:
+                    files.append(e)
+            except OSError:
+                continue
+        yield directory, files
+
+def crawl(roots: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Bring the index up to date with the output/input folders.
+
+    Directories whose mtime is unchanged since the last crawl are trusted (their
+    files are not stat'ed); in changed directories only files with a new size or
+    mtime are re-read. Files that disappeared are removed, and so is everything
+    recorded under a directory the walk no longer reaches.
+    """
+    roots = roots or _default_roots()
+    stats = {"indexed": 0, "removed": 0, "dirs_scanned": 0, "dirs_skipped": 0, "seconds": 0.0}
+    t0 = time.monotonic()
+    with _CRAWL_LOCK:
+        db = _connect()
+        try:
+            known_dirs = dict(db.execute("SELECT path, mtime_ns FROM dirs"))
+            pending = 0
+            for root in roots:
+                visited = set()
+                for directory, entries in _walk(root):
+                    try:
+                        dir_mtime = os.stat(directory).st_mtime_ns
+                    except OSError:
+                        continue
+                    visited.add(directory)
+                    if known_dirs.get(directory) == dir_mtime:
+                        stats["dirs_skipped"] += 1
+                        continue
+                    stats["dirs_scanned"] += 1
+                    # Recorded before its files so an interrupted crawl can still prune them
+                    db.execute(
+                        "INSERT OR IGNORE INTO dirs (path, root, mtime_ns) VALUES (?, ?, NULL)", (directory, root)
+                    )
+
+                    stored = {
+                        p: (size, mtime)
+                        for p, size, mtime in db.execute(
+                            "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (directory,)
+                        )
+                    }
+                    present = set()
+                    for e in entries:
+                        present.add(e.path)
+                        try:
+                            st = e.stat()
+                        except OSError:
+                            continue
+                        if stored.get(e.path) == (st.st_size, st.st_mtime_ns):
+                            continue
+                        _index_file(db, root, directory, e.path, st, e.path in stored)
+                        stats["indexed"] += 1
+                        pending += 1
+                        if pending >= COMMIT_EVERY:
+                            db.commit()
+                            pending = 0
+                    for gone in set(stored) - present:
+                        _delete_file(db, gone)
+                        stats["removed"] += 1
+                    db.execute(
+                        "INSERT OR REPLACE INTO dirs (path, root, mtime_ns) VALUES (?, ?, ?)", (directory, root, dir_mtime)
+                    )
+
+                # Directories deleted (or moved away) since the last crawl
+                vanished = [d for (d,) in db.execute("SELECT path FROM dirs WHERE root = ?", (root,)) if d not in visited]
+                for directory in vanished:
+                    for (gone,) in db.execute("SELECT path FROM files WHERE dir = ?", (directory,)).fetchall():
+                        _delete_file(db, gone)
+                        stats["removed"] += 1
+                    db.execute("DELETE FROM dirs WHERE path = ?", (directory,))
+            db.commit()
+        finally:
+            db.close()
+    stats["seconds"] = round(time.monotonic() - t0, 3)
+    _LAST_CRAWL.clear()
+    _LAST_CRAWL.update(stats)
+    return stats
+
+# ----- search -----
+
+def _fts_query(query: str, field: str) -> str:
+    terms = [t.replace('"', '""') for t in query.split() if t.strip()]
+    expr = " ".join(f'"{t}"' for t in terms)
+    if field in ("positive", "negative", "loras", "settings"):
+        return f"{field} : ({expr})"
+    return expr
+
+def search(query: str, field: str = "all", limit: int = 100) -> List[Dict[str, Any]]:
+    query = (query or "").strip()
+    if not query:
+        return []
+    limit = max(1, int(limit))
+    db = _connect()
+    try:
+        if _FTS_AVAILABLE:
+            rows = db.execute(
+                "SELECT f.path, f.positive, f.negative, f.info FROM files_fts "
+                "JOIN files f ON f.rowid = files_fts.rowid "
+                "WHERE files_fts MATCH ? ORDER BY rank LIMIT ?",
+                (_fts_query(query, field), limit),
+            ).fetchall()
+        else:
+            cols = ["positive", "negative", "loras", "settings"] if field not in SEARCH_FIELDS[1:] else [field]
+            terms = query.split()
+            where = " AND ".join("(" + " OR ".join(f"{c} LIKE ?" for c in cols) + ")" for _ in terms)
+            args = [f"%{t}%" for t in terms for _ in cols]
+            rows = db.execute(
+                f"SELECT path, positive, negative, info FROM files WHERE {where} LIMIT ?", (*args, limit)
+            ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        db.close()
+    return [{"path": p, "positive": pos, "negative": neg, "info": info} for p, pos, neg, info in rows]
+
+# ----- node -----
+
+class PromptIndexSearch:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "query": ("STRING", {"default": "", "multiline": False, "tooltip": "Words or LoRA names to look for. Every word must match."}),
+                "field": (SEARCH_FIELDS, {"default": "all"}),
+                "limit": ("INT", {"default": 100, "min": 1, "max": 10000, "step": 1}),
+                "rescan": ("BOOLEAN", {"default": False, "tooltip": "Update the index (new or changed files only) before searching."}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "INT",)
+    RETURN_NAMES = ("paths", "count",)
+    FUNCTION = "search"
+    CATEGORY = "💡Lightx02/utilities"
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        return float("NaN")
+
+    def search(self, query, field="all", limit=100, rescan=False):
+        if rescan or not os.path.exists(INDEX_PATH):
+            crawl()
+        results = search(query, field, limit)
+        return ("\n".join(r["path"] for r in results), len(results))
+
+# ----- routes -----
+
+if PromptServer and web and hasattr(PromptServer, "instance"):
+    routes = PromptServer.instance.routes
+
+    @routes.get("/extensions/lightx02/prompt-index/search")
+    async def prompt_index_search(request):
+        q = request.query.get("q", "")
+        field = request.query.get("field", "all")
+        try:
+            limit = int(request.query.get("limit", "100"))
+        except ValueError:
+            limit = 100
+        return web.json_response({"results": search(q, field, limit)})
+
+    @routes.post("/extensions/lightx02/prompt-index/rescan")
+    async def prompt_index_rescan(request):
+        if _CRAWL_LOCK.locked():
+            return web.json_response({"ok": True, "running": True, "last": dict(_LAST_CRAWL)})
+        threading.Thread(target=crawl, name="prompt-index-crawl", daemon=True).start()
+        return web.json_response({"ok": True, "running": True, "last": dict(_LAST_CRAWL)})
+
+# ----- register -----
+
+NODE_CLASS_MAPPINGS = {
+    "PromptIndexSearch": PromptIndexSearch,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "PromptIndexSearch": "🔎 Prompt Index Search",
+}
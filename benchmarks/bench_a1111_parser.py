@@ -0,0 +1,103 @@
+# Benchmark: A1111 "parameters" parsing throughput.
+#
+# Compares the previous helpers (three regex/split scans per string) with
+# parse_a1111_parameters, which also returns LoRA weights and the settings
+# dict. Results of both are checked for equality. Run from the repository root:
+#
+#   python benchmarks/bench_a1111_parser.py --count 200000
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LMMExtractPromptsNode import _info_from_record, parse_a1111_parameters  # noqa: E402
+
+# Shapes seen in the wild: plain txt2img, hires fix, LoRA-heavy, no negative,
+# multi-line prompts, quoted setting values, Forge/ComfyUI exports.
+CORPUS = [
+    "masterpiece, best quality, 1girl, solo, long hair, looking at viewer, smile\n"
+    "Negative prompt: lowres, bad anatomy, bad hands, text, error, missing fingers\n"
+    "Steps: 28, Sampler: DPM++ 2M Karras, CFG scale: 7, Seed: 1234567890, Size: 832x1216, "
+    "Model hash: 7f96a1a9ca, Model: animagineXL_v31, Version: v1.7.0",
+    "photo of a mountain lake at sunrise, mist, 35mm, <lora:add_detail:0.6> <lora:film_grain:0.3>\n"
+    "Negative prompt: cartoon, painting, illustration, (worst quality:1.4)\n"
+    "Steps: 30, Sampler: Euler a, CFG scale: 5.5, Seed: 42, Size: 1024x1024, Model hash: 31e35c80fc, "
+    "Denoising strength: 0.45, Hires upscale: 2, Hires steps: 15, Hires upscaler: 4x-UltraSharp, "
+    'Lora hashes: "add_detail: 0d9bd1b873a7, film_grain: 3e0c1f2b9a11", Version: f0.0.17v1.8.0rc',
+    "a cozy cabin in the woods, winter, warm light from windows, snow\n"
+    "Steps: 20, Sampler: DPM++ SDE Karras, CFG scale: 6, Seed: 987654321, Size: 768x512, Model: dreamshaper_8",
+    "<lora:styleA:1> <lora:charB:0.8:0.5> portrait of a knight,\nornate armor,\ndramatic lighting\n"
+    "Negative prompt: blurry, (deformed iris, deformed pupils:1.2),\nextra limbs\n"
+    "Steps: 35, Sampler: DPM++ 2M SDE, Schedule type: Karras, CFG scale: 4, Seed: 5, Size: 896x1152, "
+    'ADetailer model: face_yolov8n.pt, ADetailer prompt: "detailed face, sharp eyes", ADetailer version: 24.1.2, '
+    "Version: v1.9.4",
+    "cyberpunk city street, neon, rain, reflections\nNegative prompt: \n"
+    "Steps: 25, Sampler: UniPC, CFG scale: 7, Seed: 3141592653, Size: 1216x832, Clip skip: 2, "
+    "RNG: CPU, TI hashes: \"easynegative: c74b4e810b03\", Emphasis: Original, Version: v1.10.1",
+    "simple prompt with no settings at all",
+]
+
+
+def strip_lora_tags(text):
+    return re.sub(r'\s*<lora:[^>]+>', '', text).strip()
+
+
+def legacy_prompts(parameters):
+    neg_match = re.search(r'Negative prompt:\s*(.*)', parameters, re.DOTALL)
+    if neg_match:
+        positive = parameters.split('Negative prompt:')[0].strip()
+        negative = neg_match.group(1).split('Steps:')[0].strip()
+        return strip_lora_tags(positive), strip_lora_tags(negative)
+    positive = parameters.split('Steps:')[0].strip()
+    return strip_lora_tags(positive), ""
+
+
+def legacy_info(parameters):
+    loras = " ".join(re.findall(r'<lora:[^>]+>', parameters))
+    m = re.search(r'(Steps:\s.*)', parameters, re.DOTALL)
+    tail = m.group(1).strip() if m else ""
+    if loras and tail:
+        return f"{loras}\n{tail}"
+    return (loras or tail).strip()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--count", type=int, default=200000)
+    args = ap.parse_args()
+
+    corpus = [CORPUS[i % len(CORPUS)] + ("" if i < len(CORPUS) else f" #{i}") for i in range(args.count)]
+
+    for text in CORPUS:
+        rec = parse_a1111_parameters(text)
+        assert (rec["positive"], rec["negative"]) == legacy_prompts(text), text
+        assert _info_from_record(rec) == legacy_info(text), text
+
+    t0 = time.perf_counter()
+    for text in corpus:
+        legacy_prompts(text)
+        legacy_info(text)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for text in corpus:
+        _info_from_record(parse_a1111_parameters(text, with_settings=False))
+    t_new = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for text in corpus:
+        parse_a1111_parameters(text)
+    t_full = time.perf_counter() - t0
+
+    n = len(corpus)
+    print(f"legacy helpers (prompts + info):             {n / t_old:>12,.0f} strings/s")
+    print(f"single pass (prompts + info + lora weights): {n / t_new:>12,.0f} strings/s")
+    print(f"single pass with settings dict:              {n / t_full:>12,.0f} strings/s")
+    print("sample settings:", parse_a1111_parameters(CORPUS[1])["settings"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# Benchmark: multi-frame decode in ImageMetadataLoader.
+#
+# Compares the previous per-frame list + torch.cat decode with the
+# preallocated buffer used by image_metadata_node on synthetic animations.
+# Each measurement runs in a fresh subprocess so peak RSS is not polluted by
+# the other variant. Needs torch and a ComfyUI checkout on PYTHONPATH (for
+# comfy.* and folder_paths).
+#
+#   PYTHONPATH=/path/to/ComfyUI python benchmarks/bench_image_decode.py --frames 500 --size 512
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageOps, ImageSequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def legacy_decode(img):
+    output_images = []
+    output_masks = []
+    w, h = None, None
+
+    import torch
+
+    for frame in ImageSequence.Iterator(img):
+        frame = ImageOps.exif_transpose(frame)
+        if frame.mode == 'I':
+            frame = frame.point(lambda x: x * (1 / 255))
+        rgb_frame = frame.convert("RGB")
+
+        if len(output_images) == 0:
+            w, h = rgb_frame.size
+
+        if rgb_frame.size != (w, h):
+            continue
+
+        image_tensor = np.array(rgb_frame).astype(np.float32) / 255.0
+        image_tensor = torch.from_numpy(image_tensor)[None,]
+        output_images.append(image_tensor)
+
+        if 'A' in frame.getbands():
+            mask = np.array(frame.getchannel('A')).astype(np.float32) / 255.0
+            mask = 1. - torch.from_numpy(mask)
+        elif frame.mode == 'P' and 'transparency' in frame.info:
+            mask = np.array(frame.convert('RGBA').getchannel('A')).astype(np.float32) / 255.0
+            mask = 1. - torch.from_numpy(mask)
+        else:
+            mask = torch.zeros((64, 64), dtype=torch.float32, device="cpu")
+        output_masks.append(mask.unsqueeze(0))
+
+    if len(output_images) > 1:
+        return torch.cat(output_images, dim=0), torch.cat(output_masks, dim=0)
+    return output_images[0], output_masks[0]
+
+
+def make_animation(path: str, frames: int, size: int, alpha: bool) -> None:
+    mode = "RGBA" if alpha else "RGB"
+    ramp = np.linspace(0, 255, size, dtype=np.float32)
+    base = np.stack([ramp[None, :] + 0 * ramp[:, None], ramp[:, None] + 0 * ramp[None, :],
+                     (ramp[None, :] + ramp[:, None]) / 2, 255 - ramp[:, None] + 0 * ramp[None, :]], axis=-1)
+    base = base[..., :len(mode)].astype(np.uint8)
+    seq = [Image.fromarray(np.roll(base, i, axis=1), mode) for i in range(frames)]
+    seq[0].save(path, save_all=True, append_images=seq[1:], lossless=True, quality=0, method=0, duration=40)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss survives fork+exec (it starts at the parent's peak), so prefer
+    # the per-address-space high-water mark where Linux exposes it.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024.0 if sys.platform != "darwin" else peak / (1024.0 * 1024.0)
+
+
+def child(variant: str, path: str) -> None:
+    import torch  # noqa: F401  (import cost is excluded from the delta)
+    from image_metadata_node import _decode_frames
+
+    before = peak_rss_mb()
+    t0 = time.perf_counter()
+    img = Image.open(path)
+    if variant == "legacy":
+        image, mask = legacy_decode(img)
+    else:
+        image, mask = _decode_frames(img)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_delta_mb": peak_rss_mb() - before,
+        "output_mb": (image.numel() * image.element_size() + mask.numel() * mask.element_size()) / 2 ** 20,
+        "shape": list(image.shape),
+        "checksum": float(image[:, ::7, ::7].sum()) + float(mask[:, ::7, ::7].sum()),
+    }))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=500)
+    ap.add_argument("--size", type=int, default=512)
+    ap.add_argument("--child", nargs=2, metavar=("VARIANT", "PATH"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for alpha in (False, True):
+            path = os.path.join(tmp, f"anim_{'rgba' if alpha else 'rgb'}.webp")
+            make_animation(path, args.frames, args.size, alpha)
+            print(f"{args.frames} frames {args.size}x{args.size} {'RGBA' if alpha else 'RGB'} webp")
+            results = {}
+            for variant in ("legacy", "preallocated"):
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", variant, path],
+                    check=True, capture_output=True, text=True,
+                )
+                r = results[variant] = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"  {variant:<13} {r['seconds']:7.2f} s   peak +{r['peak_delta_mb']:8.1f} MB"
+                      f"   (output {r['output_mb']:.1f} MB)")
+            same = abs(results["legacy"]["checksum"] - results["preallocated"]["checksum"]) < 1e-3 * max(1.0, abs(results["legacy"]["checksum"]))
+            print(f"  outputs match: {same and results['legacy']['shape'] == results['preallocated']['shape']}")
+
+
+if __name__ == "__main__":
+    main()
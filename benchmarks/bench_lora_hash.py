@@ -0,0 +1,101 @@
+# Benchmark: LoRA file hashing throughput.
+#
+# Compares the legacy 4 KB read loop with lora_hashing.sha256_file at several
+# chunk sizes on synthetic files. Run from the repository root:
+#
+#   python benchmarks/bench_lora_hash.py --sizes 10,100,500,2048 --chunks 1,4,16
+#
+# Sizes and chunk sizes are in MB. Files are read once before timing so every
+# variant sees a warm page cache; use --cold on Linux (as root) to drop caches
+# between runs instead. The synthetic files are valid safetensors files, and a
+# second table compares the sha256 / addnet / quick hash modes.
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lora_hashing import HASH_MODES, hash_file, sha256_file  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def legacy_sha256(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def make_file(directory, size_mb):
+    path = os.path.join(directory, f"synthetic_{size_mb}mb.safetensors")
+    block = os.urandom(MB)
+    header = json.dumps({"__metadata__": {"ss_network_dim": "32"}}).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+def drop_caches():
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+    except OSError:
+        pass
+
+
+def timed(fn, path, cold):
+    if cold:
+        drop_caches()
+    t0 = time.perf_counter()
+    digest = fn(path)
+    return time.perf_counter() - t0, digest
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,100,500,2048")
+    ap.add_argument("--chunks", default="1,4,16")
+    ap.add_argument("--cold", action="store_true")
+    ap.add_argument("--dir", default=None)
+    args = ap.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    chunks = [int(x) for x in args.chunks.split(",") if x.strip()]
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        print(f"{'size':>8}  {'variant':<18} {'seconds':>9} {'MB/s':>9}")
+        for size_mb in sizes:
+            path = make_file(tmp, size_mb)
+            if not args.cold:
+                legacy_sha256(path)
+
+            variants = [("legacy 4 KB", legacy_sha256)]
+            for c in chunks:
+                variants.append((f"readinto {c} MB", lambda p, c=c: sha256_file(p, c * MB)))
+
+            reference = None
+            for name, fn in variants:
+                secs, digest = timed(fn, path, args.cold)
+                reference = reference or digest
+                assert digest == reference, f"{name} digest mismatch"
+                print(f"{size_mb:>6}MB  {name:<18} {secs:>9.3f} {size_mb / secs:>9.1f}")
+            for mode in HASH_MODES:
+                secs, _digest = timed(lambda p, m=mode: hash_file(p, m), path, args.cold)
+                print(f"{size_mb:>6}MB  {'mode ' + mode:<18} {secs:>9.3f} {size_mb / secs:>9.1f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Benchmark: prompt extraction from large UI-format workflows.
+#
+# Compares the previous linear-scan link resolution with the indexed
+# implementation in LMMExtractPromptsNode on synthetic workflows. Run from the
+# repository root (only Pillow is needed):
+#
+#   python benchmarks/bench_workflow_extract.py --nodes 200,800,2000
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LMMExtractPromptsNode import _extract_from_workflow_json_str, strip_lora_tags  # noqa: E402
+
+
+def legacy_extract(workflow_str: str) -> Tuple[str, str]:
+    wf = json.loads(workflow_str)
+    nodes_by_id: Dict[str, Any] = {str(n.get('id')): n for n in wf['nodes']}
+    all_links = wf.get('links', [])
+
+    def check_downstream_for_sampler(start_node, visited=None):
+        if visited is None:
+            visited = set()
+        sid = str(start_node.get('id'))
+        if sid in visited:
+            return False
+        visited.add(sid)
+        if 'Sampler' in str(start_node.get('type', '')):
+            return True
+        for outp in start_node.get('outputs', []):
+            for link_id in outp.get('links', []):
+                link_info = next((l for l in all_links if str(l[0]) == str(link_id)), None)
+                if link_info:
+                    target_node = nodes_by_id.get(str(link_info[3]))
+                    if target_node and check_downstream_for_sampler(target_node, visited):
+                        return True
+        return False
+
+    def resolve_text_fallback(node):
+        inputs = node.get('inputs', [])
+        if not any(i.get('type') == 'STRING' and 'link' in i for i in inputs):
+            val = next((w for w in node.get('widgets_values', []) if isinstance(w, str)), "")
+            return strip_lora_tags(val)
+        collected = ""
+        for i in inputs:
+            if i.get('type') == 'STRING' and 'link' in i:
+                link_info = next((l for l in all_links if str(l[0]) == str(i['link'])), None)
+                if link_info:
+                    origin_node = nodes_by_id.get(str(link_info[1]))
+                    if origin_node:
+                        collected += resolve_text_fallback(origin_node)
+        return strip_lora_tags(collected)
+
+    pos: List[str] = []
+    neg: List[str] = []
+    for node in wf['nodes']:
+        if 'CLIPTextEncode' in str(node.get('type', '')):
+            if not check_downstream_for_sampler(node):
+                continue
+            text_input = next((i for i in node.get('inputs', []) if i.get('name') == 'text'), None)
+            if text_input and 'link' in text_input:
+                link_info = next((l for l in all_links if str(l[0]) == str(text_input['link'])), None)
+                origin_node = nodes_by_id.get(str(link_info[1])) if link_info else None
+                text = resolve_text_fallback(origin_node) if origin_node else ""
+            else:
+                text = (node.get('widgets_values') or [""])[0]
+            text = strip_lora_tags(text)
+            (neg if 'negative' in str(node.get('title', '')).lower() else pos).append(text)
+    return " ".join(pos).strip(), " ".join(neg).strip()
+
+
+def make_workflow(n_nodes: int) -> str:
+    """Groups of string -> CLIPTextEncode (pos/neg) -> KSampler, padded with chains of filler nodes."""
+    nodes: List[Dict[str, Any]] = []
+    links: List[List[Any]] = []
+
+    def add_node(type_, title="", widgets=None, inputs=None):
+        node = {"id": len(nodes) + 1, "type": type_, "title": title, "inputs": inputs or [],
+                "outputs": [{"name": "out", "type": "*", "links": []}], "widgets_values": widgets or []}
+        nodes.append(node)
+        return node
+
+    def link(src, dst, input_name, type_):
+        lid = len(links) + 1
+        links.append([lid, src["id"], 0, dst["id"], len(dst["inputs"]), type_])
+        src["outputs"][0]["links"].append(lid)
+        dst["inputs"].append({"name": input_name, "type": type_, "link": lid})
+
+    while len(nodes) < n_nodes:
+        sampler = add_node("KSampler")
+        for polarity in ("positive", "negative"):
+            text = add_node("PrimitiveString", widgets=[f"{polarity} prompt {len(nodes)} <lora:x:0.5>"])
+            enc = add_node("CLIPTextEncode", title=f"{polarity.title()} Prompt")
+            link(text, enc, "text", "STRING")
+            cond = enc
+            for _ in range(3):
+                nxt = add_node("ConditioningPassthrough")
+                link(cond, nxt, "conditioning", "CONDITIONING")
+                cond = nxt
+            link(cond, sampler, polarity, "CONDITIONING")
+        prev = add_node("Filler")
+        for _ in range(10):
+            nxt = add_node("Filler")
+            link(prev, nxt, "in", "IMAGE")
+            prev = nxt
+    return json.dumps({"nodes": nodes, "links": links})
+
+
+def bench(fn, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", default="200,800,2000")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'nodes':>6} {'links':>6}  {'legacy ms':>10} {'indexed ms':>11} {'speedup':>8}")
+    for n in [int(x) for x in args.nodes.split(",") if x.strip()]:
+        data = make_workflow(n)
+        wf = json.loads(data)
+        t_old, r_old = bench(legacy_extract, data, args.repeat)
+        t_new, r_new = bench(_extract_from_workflow_json_str, data, args.repeat)
+        assert r_old == r_new, "results differ"
+        print(f"{len(wf['nodes']):>6} {len(wf['links']):>6}  {t_old * 1000:>10.1f} {t_new * 1000:>11.1f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
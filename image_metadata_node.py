@@ -3,6 +3,10 @@
 import os
 import json
 import datetime
+import math
+import threading
+import time
+from collections import OrderedDict
 from PIL import Image, PngImagePlugin, ImageSequence, ImageOps
 import numpy as np
 import torch
@@ -10,17 +14,329 @@ from comfy.comfy_types import IO, ComfyNodeABC, InputTypeDict
 from comfy.cli_args import args
 import folder_paths
 
+try:
+    from .lora_hashing import sha256_file
+except ImportError:
+    from lora_hashing import sha256_file
+
+# Cached listing of the input directory: (input_dir, dir mtime_ns) -> sorted image names
+INPUT_LISTING_SETTLE_NS = 2_000_000_000
+_INPUT_LISTING = {"key": None, "files": []}
+_INPUT_LISTING_LOCK = threading.Lock()
+
+def _list_input_images():
+    input_dir = folder_paths.get_input_directory()
+    try:
+        key = (input_dir, os.stat(input_dir).st_mtime_ns)
+    except OSError:
+        return []
+
+    with _INPUT_LISTING_LOCK:
+        if _INPUT_LISTING["key"] == key:
+            return list(_INPUT_LISTING["files"])
+
+    # Adding, removing or renaming an entry bumps the directory mtime, so the
+    # scan below only runs when the listing can actually differ.
+    with os.scandir(input_dir) as it:
+        files = [e.name for e in it if e.is_file()]
+    files = sorted(folder_paths.filter_files_content_types(files, ["image"]))
+
+    # Don't trust an mtime that is still "fresh": on filesystems with coarse
+    # timestamps a second change within the same tick would go unnoticed.
+    if time.time_ns() - key[1] > INPUT_LISTING_SETTLE_NS:
+        with _INPUT_LISTING_LOCK:
+            _INPUT_LISTING["key"] = key
+            _INPUT_LISTING["files"] = files
+    return list(files)
+
+# Frames are written straight into a preallocated float32 buffer; when the
+# container does not report its frame count the buffer grows in chunks.
+FRAME_GROW_CHUNK = 64
+
+# Multi-picture formats whose extra frames are not animation (only the first is used)
+EXCLUDED_FORMATS = ['MPO']
+
+# EXIF orientations that swap width and height once transposed
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+# Full-scale value of single-channel high bit depth modes. 'I' follows the
+# ComfyUI convention of holding 16-bit data; 'F' is expected to be 0..1.
+HIGH_BIT_RANGES = {
+    'I': 65535.0,
+    'I;16': 65535.0,
+    'I;16B': 65535.0,
+    'I;16L': 65535.0,
+    'I;16N': 65535.0,
+    'F': 1.0,
+}
+
+def _high_bit_plane(frame):
+    # Scaled to 0..255 in float32 so it shares the batch-wide /255 below
+    # without being quantised to 8 bits first.
+    plane = np.array(frame, dtype=np.float32)
+    plane *= 255.0 / HIGH_BIT_RANGES[frame.mode]
+    return np.clip(plane, 0.0, 255.0, out=plane)
+
+def _frame_alpha(frame):
+    if 'A' in frame.getbands():
+        return frame.getchannel('A')
+    if frame.mode == 'P' and 'transparency' in frame.info:
+        return frame.convert('RGBA').getchannel('A')
+    return None
+
+def _exif_orientation(img):
+    try:
+        return img.getexif().get(0x0112)
+    except Exception:
+        return None
+
+def _crop_box(crop, full_w, full_h):
+    """Clamp (left, top, width, height) to the image; width/height 0 = to the edge."""
+    if not crop or not any(crop):
+        return None
+    left, top, width, height = (max(0, int(v)) for v in crop)
+    left, top = min(left, full_w - 1), min(top, full_h - 1)
+    right = full_w if width == 0 else min(full_w, left + width)
+    bottom = full_h if height == 0 else min(full_h, top + height)
+    return (left, top, right, bottom)
+
+def _reducible(frame):
+    # Image.reduce() and a good resize() need a continuous-tone mode
+    if frame.mode in ('P', 'PA'):
+        has_alpha = frame.mode == 'PA' or 'transparency' in frame.info
+        return frame.convert('RGBA' if has_alpha else 'RGB')
+    if frame.mode == '1':
+        return frame.convert('L')
+    if frame.mode.startswith('I;16'):
+        return frame.convert('I')
+    return frame
+
+def _fit_frame(frame, box, full_size, max_side):
+    """Crop ``frame`` to ``box`` (given in full-resolution coordinates, so it still
+    applies after a JPEG draft) and shrink it so its longer side is at most
+    ``max_side``. The integer part of the shrink is done by Image.reduce on the
+    box, so only the remainder goes through a resampling filter."""
+    fw, fh = frame.size
+    if box is None:
+        fbox = (0, 0, fw, fh)
+    else:
+        sx, sy = fw / full_size[0], fh / full_size[1]
+        left, top = int(box[0] * sx), int(box[1] * sy)
+        fbox = (left, top, max(left + 1, round(box[2] * sx)), max(top + 1, round(box[3] * sy)))
+    bw, bh = fbox[2] - fbox[0], fbox[3] - fbox[1]
+
+    factor = int(max(bw, bh) // max_side) if max_side else 1
+    if factor > 1:
+        frame = _reducible(frame).reduce(factor, box=fbox)
+    elif fbox != (0, 0, fw, fh):
+        frame = frame.crop(fbox)
+
+    if max_side and max(frame.size) > max_side:
+        scale = max_side / max(frame.size)
+        size = (max(1, round(frame.width * scale)), max(1, round(frame.height * scale)))
+        frame = _reducible(frame).resize(size, Image.LANCZOS)
+    return frame
+
+def _grow_frames(buf, capacity, fill):
+    extra = np.full((capacity - buf.shape[0],) + buf.shape[1:], fill, dtype=buf.dtype)
+    return np.concatenate((buf, extra))
+
+def _frame_indices(img, start_frame=0, frame_count=0, stride=1):
+    """Indices of the frames to load: every ``stride``-th frame from
+    ``start_frame``, at most ``frame_count`` of them (0 = until the end)."""
+    if img.format in EXCLUDED_FORMATS:
+        return range(0, 1)
+    total = max(1, int(getattr(img, "n_frames", 1) or 1))
+    if start_frame >= total:
+        raise ValueError(f"start_frame {start_frame} is out of range: the image has {total} frame(s).")
+    indices = range(start_frame, total, max(1, stride))
+    if frame_count > 0:
+        indices = indices[:frame_count]
+    return indices
+
+def _seek_frames(img, indices):
+    # Frames in between are only seeked past: no conversion, no allocation here
+    for index in indices:
+        img.seek(index)
+        yield img
+
+def _decode_frames(img, frames=None, max_side=0, crop=None):
+    """Decode the frames of ``img`` into (IMAGE, MASK) tensors.
+
+    Each frame's uint8 pixels are copied into one preallocated buffer and the
+    0..255 -> 0..1 scaling runs once, in place, over the whole batch, so peak
+    memory stays close to the size of the final tensors. 16-bit and float
+    frames are normalised with numpy and keep their full precision.
+
+    ``frames`` selects frame indices (None = every frame). ``crop``
+    (left, top, width, height) and ``max_side`` are applied to each
+    frame before it reaches the float buffer; JPEGs are additionally decoded
+    at a reduced DCT scale via draft().
+    """
+    if frames is None:
+        capacity = max(1, int(getattr(img, "n_frames", 1) or 1))
+        source = ImageSequence.Iterator(img)
+    else:
+        capacity = max(1, len(frames))
+        source = _seek_frames(img, frames)
+
+    orientation = _exif_orientation(img)
+    full_w, full_h = img.size
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        full_w, full_h = full_h, full_w
+    box = _crop_box(crop, full_w, full_h)
+    max_side = max(0, int(max_side or 0))
+    if max_side:
+        region = max(box[2] - box[0], box[3] - box[1]) if box else max(full_w, full_h)
+        scale = max_side / region
+        if scale < 1:
+            # No-op for formats without draft support
+            img.draft(img.mode, (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+    resize = box is not None or max_side > 0
+
+    images = None
+    masks = None
+    count = 0
+    w, h = None, None
+
+    for frame in source:
+        if orientation not in (None, 1):
+            frame = ImageOps.exif_transpose(frame)
+        if resize:
+            frame = _fit_frame(frame, box, (full_w, full_h), max_side)
+
+        if images is None:
+            w, h = frame.size
+            images = np.empty((capacity, h, w, 3), dtype=np.float32)
+
+        if frame.size != (w, h):
+            continue
+
+        if count == images.shape[0]:
+            images = _grow_frames(images, count + FRAME_GROW_CHUNK, 0)
+            if masks is not None:
+                masks = _grow_frames(masks, count + FRAME_GROW_CHUNK, 255)
+
+        if frame.mode in HIGH_BIT_RANGES:
+            images[count] = _high_bit_plane(frame)[..., None]
+        else:
+            images[count] = np.asarray(frame if frame.mode == "RGB" else frame.convert("RGB"))
+
+        alpha = _frame_alpha(frame)
+        if alpha is not None:
+            if masks is None:
+                # 255 (opaque) becomes 0 after inversion, matching frames without alpha
+                masks = np.full((images.shape[0], h, w), 255, dtype=np.float32)
+            masks[count] = np.asarray(alpha)
+        count += 1
+
+    output_image = torch.from_numpy(images[:count]).div_(255.0)
+    if masks is not None:
+        output_mask = torch.from_numpy(masks[:count]).div_(-255.0).add_(1.0)
+    else:
+        output_mask = torch.zeros((count, 64, 64), dtype=torch.float32, device="cpu")
+    return output_image, output_mask
+
+# ----- decoded image cache -----
+
+# Byte budget for decoded (image, metadata, mask) tuples shared by every
+# loader in the process. Override with LIGHTX02_IMAGE_CACHE_MB (0 disables).
+DECODED_CACHE_BYTES = int(float(os.environ.get("LIGHTX02_IMAGE_CACHE_MB", "1024")) * 1024 * 1024)
+
+def _file_fingerprint(path, verify_content=False):
+    """Cheap identity of the file behind ``path``: stat signature, or the sha256
+    of its bytes when ``verify_content`` is set (catches rewrites that keep
+    size and mtime)."""
+    st = os.stat(path)
+    if verify_content:
+        return ("sha256", sha256_file(path))
+    return ("stat", os.path.realpath(path), st.st_size, st.st_mtime_ns, st.st_ino)
+
+def _tensor_bytes(t):
+    return t.numel() * t.element_size()
+
+class _DecodedImageCache:
+    """Process-wide LRU of decoded loader outputs, bounded by total tensor bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = sum(_tensor_bytes(v) for v in value if isinstance(v, torch.Tensor))
+        with self._lock:
+            if key in self._data:
+                self.bytes -= self._data.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self.bytes -= self._data.popitem(last=False)[1][1]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self.bytes, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+            self.hits = self.misses = 0
+
+_DECODED_CACHE = _DecodedImageCache(DECODED_CACHE_BYTES)
+
+def set_decoded_cache_budget(max_bytes):
+    with _DECODED_CACHE._lock:
+        _DECODED_CACHE.max_bytes = max(0, int(max_bytes))
+        while _DECODED_CACHE.bytes > _DECODED_CACHE.max_bytes:
+            _DECODED_CACHE.bytes -= _DECODED_CACHE._data.popitem(last=False)[1][1]
+
+def decoded_cache_stats():
+    return _DECODED_CACHE.stats()
+
 # Node to load image with metadata
 class ImageMetadataLoader(ComfyNodeABC):
     @classmethod
     def INPUT_TYPES(s):
-        input_dir = folder_paths.get_input_directory()
-        files = [f for f in os.listdir(input_dir) if os.path.isfile(os.path.join(input_dir, f))]
-        files = folder_paths.filter_files_content_types(files, ["image"])
-        return {"required": {"image": (sorted(files), {"image_upload": True})}}
+        return {
+            "required": {"image": (_list_input_images(), {"image_upload": True})},
+            "optional": {
+                "verify_content": ("BOOLEAN", {"default": False, "tooltip": "Hash the file contents to detect changes instead of trusting size and modification time."}),
+                "max_side": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8, "tooltip": "Downscale while decoding so the longer side is at most this many pixels (0 = full size)."}),
+                "crop_left": ("INT", {"default": 0, "min": 0, "max": 65535, "step": 1}),
+                "crop_top": ("INT", {"default": 0, "min": 0, "max": 65535, "step": 1}),
+                "crop_width": ("INT", {"default": 0, "min": 0, "max": 65535, "step": 1, "tooltip": "Crop region in source pixels, applied before max_side (0 = to the right edge)."}),
+                "crop_height": ("INT", {"default": 0, "min": 0, "max": 65535, "step": 1, "tooltip": "Crop region in source pixels, applied before max_side (0 = to the bottom edge)."}),
+                "start_frame": ("INT", {"default": 0, "min": 0, "max": 1000000, "step": 1, "tooltip": "First frame to load from an animated image."}),
+                "frame_count": ("INT", {"default": 0, "min": 0, "max": 1000000, "step": 1, "tooltip": "Number of frames to load (0 = until the end)."}),
+                "stride": ("INT", {"default": 1, "min": 1, "max": 10000, "step": 1, "tooltip": "Load every Nth frame."}),
+            },
+        }
 
     @classmethod
-    def VALIDATE_INPUTS(s, image):
+    def IS_CHANGED(s, image, verify_content=False, **kwargs):
+        try:
+            return repr(_file_fingerprint(folder_paths.get_annotated_filepath(image), verify_content))
+        except OSError:
+            return ""
+
+    @classmethod
+    def VALIDATE_INPUTS(s, image, **kwargs):
         if not folder_paths.exists_annotated_filepath(image):
             return f"Invalid image file: {image}"
         return True
@@ -30,51 +346,68 @@ class ImageMetadataLoader(ComfyNodeABC):
     FUNCTION = "load_image_with_metadata"
     DESCRIPTION = "Loads images with original metadata intact."
 
-    def load_image_with_metadata(self, image):
+    def load_image_with_metadata(self, image, verify_content=False, max_side=0,
+                                 crop_left=0, crop_top=0, crop_width=0, crop_height=0,
+                                 start_frame=0, frame_count=0, stride=1):
         image_path = folder_paths.get_annotated_filepath(image)
+        crop = (crop_left, crop_top, crop_width, crop_height)
+        cache_key = (_file_fingerprint(image_path, verify_content), max_side, crop, start_frame, frame_count, stride)
+        cached = _DECODED_CACHE.get(cache_key)
+        if cached is not None:
+            output_image, metadata, output_mask = cached
+            return (output_image, dict(metadata), output_mask)
+
         img = Image.open(image_path)
 
         metadata = img.info.copy()
-        output_images = []
-        output_masks = []
-        w, h = None, None
 
-        excluded_formats = ['MPO']
+        frames = _frame_indices(img, start_frame, frame_count, stride)
 
-        for frame in ImageSequence.Iterator(img):
-            frame = ImageOps.exif_transpose(frame)
-            if frame.mode == 'I':
-                frame = frame.point(lambda x: x * (1 / 255))
-            rgb_frame = frame.convert("RGB")
-
-            if len(output_images) == 0:
-                w, h = rgb_frame.size
-
-            if rgb_frame.size != (w, h):
-                continue
-
-            image_tensor = np.array(rgb_frame).astype(np.float32) / 255.0
-            image_tensor = torch.from_numpy(image_tensor)[None,]
-            output_images.append(image_tensor)
-
-            if 'A' in frame.getbands():
-                mask = np.array(frame.getchannel('A')).astype(np.float32) / 255.0
-                mask = 1. - torch.from_numpy(mask)
-            elif frame.mode == 'P' and 'transparency' in frame.info:
-                mask = np.array(frame.convert('RGBA').getchannel('A')).astype(np.float32) / 255.0
-                mask = 1. - torch.from_numpy(mask)
-            else:
-                mask = torch.zeros((64,64), dtype=torch.float32, device="cpu")
-            output_masks.append(mask.unsqueeze(0))
+        output_image, output_mask = _decode_frames(img, frames, max_side, crop)
+        _DECODED_CACHE.put(cache_key, (output_image, metadata, output_mask))
+        return (output_image, dict(metadata), output_mask)
 
-        if len(output_images) > 1 and img.format not in excluded_formats:
-            output_image = torch.cat(output_images, dim=0)
-            output_mask = torch.cat(output_masks, dim=0)
-        else:
-            output_image = output_images[0]
-            output_mask = output_masks[0]
 
-        return (output_image, metadata, output_mask)
+# Node to read metadata without decoding pixels
+class ImageMetadataReader(ComfyNodeABC):
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"image": (_list_input_images(), {"image_upload": True})}}
+
+    @classmethod
+    def IS_CHANGED(s, image, **kwargs):
+        try:
+            return repr(_file_fingerprint(folder_paths.get_annotated_filepath(image)))
+        except OSError:
+            return ""
+
+    @classmethod
+    def VALIDATE_INPUTS(s, image, **kwargs):
+        if not folder_paths.exists_annotated_filepath(image):
+            return f"Invalid image file: {image}"
+        return True
+
+    CATEGORY = "💡Lightx02/utilities"
+    RETURN_TYPES = ("METADATA", "INT", "INT", "INT")
+    RETURN_NAMES = ("metadata", "width", "height", "frame_count")
+    FUNCTION = "read_metadata"
+    DESCRIPTION = "Reads an image's metadata, size and frame count from its header without decoding any pixels."
+
+    def read_metadata(self, image):
+        image_path = folder_paths.get_annotated_filepath(image)
+        # Image.open only parses the header (for PNG: every chunk before the
+        # first IDAT), which is exactly what the loader's METADATA holds.
+        with Image.open(image_path) as img:
+            metadata = img.info.copy()
+            width, height = img.size
+            if img.format in EXCLUDED_FORMATS:
+                frame_count = 1
+            else:
+                frame_count = max(1, int(getattr(img, "n_frames", 1) or 1))
+            orientation = _exif_orientation(img)
+        if orientation in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        return (metadata, width, height, frame_count)
 
 
 # Node to save image with metadata
@@ -184,14 +517,16 @@ class ImageMetadataSaver(ComfyNodeABC):
         return {"ui": {"images": results}}
 
 
-# Register both nodes with new names
+# Register nodes
 NODE_CLASS_MAPPINGS = {
     "ImageMetadataLoader": ImageMetadataLoader,
+    "ImageMetadataReader": ImageMetadataReader,
     "ImageMetadataSaver": ImageMetadataSaver
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "ImageMetadataLoader": "📝 Image Metadata Loader",
+    "ImageMetadataReader": "📝 Image Metadata Reader",
     "ImageMetadataSaver": "📝✅ Image Metadata Saver"
 
 }
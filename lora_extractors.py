@@ -0,0 +1,106 @@
+# ----- SECTION: Imports -----
+import json
+from typing import Any, Callable, Dict, List, Tuple
+
+
+# ----- SECTION: Extractors -----
+def _is_rgthree_power_lora_loader(class_type: str) -> bool:
+    ct = (class_type or "").strip()
+    if not ct:
+        return False
+    lowered = ct.lower()
+    if lowered == "rgthreepowerloraloader":
+        return True
+    if lowered == "power lora loader":
+        return True
+    if "power" in lowered and "lora" in lowered and "loader" in lowered:
+        return True
+    return False
+
+
+def _extract_configs_from_rgthree_node(prompt_node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    inputs = prompt_node.get("inputs") or {}
+    result: List[Dict[str, Any]] = []
+
+    for name, value in inputs.items():
+        if not isinstance(name, str):
+            continue
+        if not name.startswith("lora_"):
+            continue
+        if not isinstance(value, dict):
+            continue
+        if not value.get("on", False):
+            continue
+        if "lora" not in value or "strength" not in value:
+            continue
+
+        lora_name = value.get("lora")
+        if not isinstance(lora_name, str) or not lora_name.strip():
+            continue
+
+        strength = value.get("strength", 1.0)
+        result.append(
+            {
+                "on": True,
+                "lora": lora_name.strip(),
+                "strength": float(strength) if isinstance(strength, (int, float, str)) else 1.0,
+            }
+        )
+
+    return result
+
+
+def _extract_selection_data_from_local_lora_gallery(prompt_node: Dict[str, Any]) -> str:
+    inputs = prompt_node.get("inputs") or {}
+    sel = inputs.get("selection_data")
+    if isinstance(sel, str) and sel.strip():
+        return sel
+    return "[]"
+
+
+def _extract_configs_from_local_lora_gallery(prompt_node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    selection_data = _extract_selection_data_from_local_lora_gallery(prompt_node)
+    try:
+        configs = json.loads(selection_data) if selection_data else []
+    except Exception:
+        configs = []
+    return configs if isinstance(configs, list) else []
+
+
+def _extract_configs_from_core_lora_loader(prompt_node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    inputs = prompt_node.get("inputs") or {}
+    lora_name = inputs.get("lora_name")
+    if not isinstance(lora_name, str) or not lora_name.strip():
+        return []
+    strength = inputs.get("strength_model", 1.0)
+    return [
+        {
+            "on": True,
+            "lora": lora_name.strip(),
+            "strength": float(strength) if isinstance(strength, (int, float)) else 1.0,
+        }
+    ]
+
+
+# (class_type predicate, extractor) pairs, checked in order.
+_LORA_EXTRACTORS: List[Tuple[Callable[[str], bool], Callable[[Dict[str, Any]], List[Dict[str, Any]]]]] = [
+    (lambda ct: ct in {"LocalLoraGallery", "LocalLoraGalleryModelOnly"}, _extract_configs_from_local_lora_gallery),
+    (_is_rgthree_power_lora_loader, _extract_configs_from_rgthree_node),
+    (lambda ct: ct in {"LoraLoader", "LoraLoaderModelOnly"}, _extract_configs_from_core_lora_loader),
+]
+
+
+def register_lora_extractor(
+    match: Callable[[str], bool],
+    extractor: Callable[[Dict[str, Any]], List[Dict[str, Any]]],
+) -> None:
+    _LORA_EXTRACTORS.append((match, extractor))
+
+
+def node_lora_configs(prompt_node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """LoRA configs (``on`` / ``lora`` / ``strength``) applied by one API-prompt node, if any."""
+    class_type = str(prompt_node.get("class_type") or "")
+    for match, extractor in _LORA_EXTRACTORS:
+        if match(class_type):
+            return extractor(prompt_node)
+    return []
@@ -0,0 +1,212 @@
+# ----- SECTION: Imports -----
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# ----- SECTION: Constants -----
+CLAIM_TTL = 900.0
+CLAIM_POLL_INTERVAL = 0.5
+BUSY_TIMEOUT_MS = 30000
+
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_STILL_ACTIVE = 259
+_ERROR_ACCESS_DENIED = 5
+
+
+# ----- SECTION: Helpers -----
+def _pid_alive_nt(pid: int) -> bool:
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Access denied means the process exists but belongs to someone else.
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        try:
+            return _pid_alive_nt(pid)
+        except Exception:
+            return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except Exception:
+        return True
+    return True
+
+
+# ----- SECTION: Store -----
+class SharedHashStore:
+    """SQLite (WAL) hash store shared by every ComfyUI process on one machine.
+
+    Rows hold the same entries as the JSON hash cache (stat signature plus one
+    hash per mode). ``claim`` / ``release`` make sure a file is hashed by a single
+    process at a time; the others wait for the row to appear. ``exclusive`` is a
+    machine-wide mutex used to serialize rewrites of shared JSON files.
+
+    With ``prefixes_of`` (entry -> hash prefixes) every row is also indexed by
+    its hash prefixes, so ``find_by_prefix`` sees files hashed by any process.
+    """
+
+    def __init__(self, path: str, prefixes_of: Optional[Callable[[Dict[str, Any]], Iterable[str]]] = None):
+        self.path = path
+        self.prefixes_of = prefixes_of
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._tx() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, ino INTEGER, entry TEXT NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS claims ("
+                "path TEXT NOT NULL, mode TEXT NOT NULL, owner TEXT NOT NULL, claimed_at REAL NOT NULL, "
+                "PRIMARY KEY (path, mode))"
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS hash_prefixes ("
+                "prefix TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (prefix, path))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS hash_prefixes_path ON hash_prefixes (path)")
+            if prefixes_of is not None and db.execute("SELECT 1 FROM hash_prefixes LIMIT 1").fetchone() is None:
+                # Stores created before the prefix table existed
+                for p, entry in db.execute("SELECT path, entry FROM file_hashes").fetchall():
+                    self._index_prefixes(db, p, self._decode(entry))
+
+    def _conn(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    # -- entries --
+    @staticmethod
+    def _decode(raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = json.loads(raw)
+        except Exception:
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def _index_prefixes(self, db: sqlite3.Connection, path: str, entry: Optional[Dict[str, Any]]) -> None:
+        if self.prefixes_of is None:
+            return
+        db.execute("DELETE FROM hash_prefixes WHERE path = ?", (path,))
+        if entry:
+            db.executemany(
+                "INSERT OR IGNORE INTO hash_prefixes (prefix, path) VALUES (?, ?)",
+                [(prefix, path) for prefix in set(self.prefixes_of(entry))],
+            )
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT entry FROM file_hashes WHERE path = ?", (path,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def put(self, path: str, entry: Dict[str, Any]) -> None:
+        with self._tx() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, ino, entry) VALUES (?, ?, ?, ?, ?)",
+                (path, entry.get("size"), entry.get("mtime_ns"), entry.get("ino"), json.dumps(entry, ensure_ascii=False)),
+            )
+            self._index_prefixes(db, path, entry)
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        with self._tx() as db:
+            for p, e in items:
+                cur = db.execute(
+                    "INSERT OR IGNORE INTO file_hashes (path, size, mtime_ns, ino, entry) VALUES (?, ?, ?, ?, ?)",
+                    (p, e.get("size"), e.get("mtime_ns"), e.get("ino"), json.dumps(e, ensure_ascii=False)),
+                )
+                if cur.rowcount:
+                    self._index_prefixes(db, p, e)
+
+    def find_by_prefix(self, prefix: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(path, entry) of every row with a hash prefix starting with ``prefix``."""
+        if not prefix:
+            return []
+        rows = self._conn().execute(
+            "SELECT DISTINCT f.path, f.entry FROM hash_prefixes p JOIN file_hashes f ON f.path = p.path "
+            "WHERE p.prefix >= ? AND p.prefix < ?",
+            (prefix, prefix + "\uffff"),
+        ).fetchall()
+        out = []
+        for path, raw in rows:
+            entry = self._decode(raw)
+            if entry is not None:
+                out.append((path, entry))
+        return out
+
+    def count(self) -> int:
+        return int(self._conn().execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0])
+
+    # -- claims --
+    def _claim_is_stale(self, owner: str, claimed_at: float) -> bool:
+        if time.time() - claimed_at > CLAIM_TTL:
+            return True
+        host, _, pid = owner.rpartition(":")
+        if host == socket.gethostname() and pid.isdigit():
+            return not _pid_alive(int(pid))
+        return False
+
+    def claim(self, path: str, mode: str) -> bool:
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute("SELECT owner, claimed_at FROM claims WHERE path = ? AND mode = ?", (path, mode)).fetchone()
+            if row is not None and row[0] != self.owner and not self._claim_is_stale(row[0], row[1]):
+                return False
+            db.execute(
+                "INSERT OR REPLACE INTO claims (path, mode, owner, claimed_at) VALUES (?, ?, ?, ?)",
+                (path, mode, self.owner, now),
+            )
+        return True
+
+    def release(self, path: str, mode: str) -> None:
+        with self._tx() as db:
+            db.execute("DELETE FROM claims WHERE path = ? AND mode = ? AND owner = ?", (path, mode, self.owner))
+
+    # -- locking --
+    @contextmanager
+    def exclusive(self, name: str) -> Iterator[None]:
+        # BEGIN IMMEDIATE takes the database write lock, which every process shares.
+        with self._tx() as db:
+            db.execute("INSERT OR IGNORE INTO locks (name) VALUES (?)", (name,))
+            yield
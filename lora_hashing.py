@@ -0,0 +1,128 @@
+# ----- SECTION: Imports -----
+import hashlib
+import json
+import os
+import struct
+from typing import Optional, Tuple
+
+
+# ----- SECTION: Constants -----
+HASH_CHUNK_SIZE = 1024 * 1024
+QUICK_HASH_WINDOW = 4 * 1024 * 1024
+SAFETENSORS_MAX_HEADER = 100 * 1024 * 1024
+
+# "sha256": whole file (what the gallery metadata stores)
+# "addnet": tensor-data region of a safetensors file (kohya/A1111 addnet hash)
+# "quick":  header + size + first/last QUICK_HASH_WINDOW bytes of tensor data
+HASH_MODES = ("sha256", "addnet", "quick")
+
+
+# ----- SECTION: Hashing -----
+def sha256_file(filepath: str, chunk_size: int = HASH_CHUNK_SIZE) -> Optional[str]:
+    """Full SHA-256 hex digest of ``filepath``.
+
+    Reads with ``readinto`` into one reusable buffer, so a 1 GB file costs a few
+    hundred Python iterations instead of hundreds of thousands of 4 KB reads.
+    """
+    chunk_size = max(64 * 1024, int(chunk_size))
+    h = hashlib.sha256()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    try:
+        with open(filepath, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _hash_range(f, h, start: int, length: Optional[int], chunk_size: int) -> None:
+    f.seek(start)
+    buf = bytearray(max(64 * 1024, int(chunk_size)))
+    view = memoryview(buf)
+    remaining = length
+    while remaining is None or remaining > 0:
+        want = len(buf) if remaining is None else min(len(buf), remaining)
+        n = f.readinto(view[:want])
+        if not n:
+            break
+        h.update(view[:n])
+        if remaining is not None:
+            remaining -= n
+
+
+def read_safetensors_header(filepath: str) -> Optional[Tuple[int, bytes]]:
+    """Return ``(data_offset, header_json_bytes)`` or ``None`` if not a safetensors file."""
+    try:
+        with open(filepath, "rb") as f:
+            raw = f.read(8)
+            if len(raw) != 8:
+                return None
+            (n,) = struct.unpack("<Q", raw)
+            if n <= 0 or n > SAFETENSORS_MAX_HEADER:
+                return None
+            header = f.read(n)
+    except OSError:
+        return None
+    if len(header) != n or not header.lstrip().startswith(b"{"):
+        return None
+    try:
+        json.loads(header)
+    except Exception:
+        return None
+    return 8 + n, header
+
+
+def addnet_hash_file(filepath: str, chunk_size: int = HASH_CHUNK_SIZE) -> Optional[str]:
+    """SHA-256 of the tensor-data region, ignoring the (often edited) JSON header.
+
+    Falls back to the full-file hash for non-safetensors files.
+    """
+    parsed = read_safetensors_header(filepath)
+    if parsed is None:
+        return sha256_file(filepath, chunk_size)
+    offset, _header = parsed
+    h = hashlib.sha256()
+    try:
+        with open(filepath, "rb", buffering=0) as f:
+            _hash_range(f, h, offset, None, chunk_size)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def quick_hash_file(filepath: str, window: int = QUICK_HASH_WINDOW) -> Optional[str]:
+    """Fingerprint from the header, the data size and two fixed windows of tensor data.
+
+    Reads at most ``2 * window`` bytes plus the header whatever the file size. Not
+    interchangeable with sha256/addnet hashes published elsewhere.
+    """
+    parsed = read_safetensors_header(filepath)
+    offset, header = parsed if parsed is not None else (0, b"")
+    try:
+        size = os.path.getsize(filepath)
+        h = hashlib.sha256()
+        h.update(header)
+        h.update(struct.pack("<Q", size - offset))
+        with open(filepath, "rb", buffering=0) as f:
+            data_len = size - offset
+            if data_len <= 2 * window:
+                _hash_range(f, h, offset, data_len, window)
+            else:
+                _hash_range(f, h, offset, window, window)
+                _hash_range(f, h, size - window, window, window)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def hash_file(filepath: str, mode: str = "sha256", chunk_size: int = HASH_CHUNK_SIZE) -> Optional[str]:
+    if mode == "addnet":
+        return addnet_hash_file(filepath, chunk_size)
+    if mode == "quick":
+        return quick_hash_file(filepath)
+    return sha256_file(filepath, chunk_size)
@@ -0,0 +1,80 @@
+# Developed by Light-x02
+# https://github.com/Light-x02/ComfyUI-Lightx02-Node
+import struct
+import zlib
+from typing import Dict, Iterable, Optional
+
+# ----- constants -----
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+TEXT_CHUNKS = (b"tEXt", b"zTXt", b"iTXt")
+MAX_TEXT_BYTES = 64 * 1024 * 1024
+
+# ----- helpers -----
+
+def _inflate(data: bytes) -> bytes:
+    d = zlib.decompressobj()
+    out = d.decompress(data, MAX_TEXT_BYTES)
+    if d.unconsumed_tail:
+        raise ValueError("text chunk too large")
+    return out
+
+def _decode_text_chunk(ctype: bytes, data: bytes) -> Optional[tuple]:
+    key, sep, rest = data.partition(b"\0")
+    if not sep:
+        return None
+    keyword = key.decode("latin-1")
+    if ctype == b"tEXt":
+        return keyword, rest.decode("latin-1", "replace")
+    if ctype == b"zTXt":
+        if not rest or rest[0] != 0:
+            return None
+        return keyword, _inflate(rest[1:]).decode("latin-1", "replace")
+    # iTXt: compression flag, method, language\0, translated keyword\0, utf-8 text
+    if len(rest) < 2:
+        return None
+    compressed, method = rest[0], rest[1]
+    _lang, _, rest = rest[2:].partition(b"\0")
+    _tkey, _, text = rest.partition(b"\0")
+    if compressed:
+        if method != 0:
+            return None
+        text = _inflate(text)
+    return keyword, text.decode("utf-8", "replace")
+
+# ----- reader -----
+
+def read_png_text_chunks(path: str, keys: Optional[Iterable[str]] = None) -> Optional[Dict[str, str]]:
+    """Text chunks of a PNG read straight from the chunk stream.
+
+    Only chunk headers are read until the first IDAT; non-text chunks are skipped
+    with a seek and only text chunks are decompressed, so no pixel data is touched.
+    Returns None when the file is not a PNG (callers fall back to PIL).
+    """
+    wanted = set(keys) if keys is not None else None
+    out: Dict[str, str] = {}
+    with open(path, "rb") as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                break
+            length, ctype = struct.unpack(">I4s", head)
+            if ctype in (b"IDAT", b"IEND"):
+                break
+            if ctype not in TEXT_CHUNKS:
+                f.seek(length + 4, 1)
+                continue
+            data = f.read(length)
+            f.seek(4, 1)
+            try:
+                decoded = _decode_text_chunk(ctype, data)
+            except (ValueError, zlib.error):
+                continue
+            if decoded is None:
+                continue
+            keyword, text = decoded
+            if wanted is None or keyword in wanted:
+                out.setdefault(keyword, text)
+    return out